@@ -1,14 +1,43 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
 from flask_cors import CORS
-import pandas as pd
+from werkzeug.exceptions import RequestEntityTooLarge
 import numpy as np
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.preprocessing import StandardScaler
+import logging
 import os
+import threading
+import time
+from collections import namedtuple
+
+from artifact import DATASET_PATH, FEATURE_ORDER, KEY_MAP, MODEL_PATH, load_artifact
+from inference import (
+    format_predictions,
+    frame_from_arrow,
+    frame_from_csv,
+    frame_from_json,
+    frame_to_matrix,
+    predict_matrix,
+    range_arrays,
+    validate_record,
+)
+from forest_engine import FLAT_MAX_ROWS, FlatForest, RoutedForest, SklearnForest
+import metrics
+from metrics import CounterFunc, Gauge, errors_total, request_seconds, requests_total, rows_total, stage_seconds
+from profiler import SlowRequestProfiler
+from prediction_cache import PredictionCache, SqliteBackend
+from sweep import OBJECTIVES, build_axes, sweep_lines
+from dataset import open_dataset
+from train_model import dataset_version, train_full
 
 app = Flask(__name__)
 CORS(app)
 
+# LOG_LEVEL=DEBUG logs every prediction's input and output
+logging.basicConfig(
+    level=os.environ.get("LOG_LEVEL", "INFO").upper(),
+    format="%(asctime)s level=%(levelname)s logger=%(name)s %(message)s",
+)
+log = logging.getLogger("solar_backend")
+
 @app.route("/")
 def home():
     return jsonify({
@@ -18,85 +47,308 @@ def home():
 
 
 # ================================
-# Load Dataset & Train Model
+# Load Model Artifact
 # ================================
-DATASET_PATH = "dataset.xlsx"
-
+# Built offline by train_model.py and loaded here, before gunicorn forks (see
+# gunicorn.conf.py). The flat forest arrays are memory-mapped, so every worker
+# shares them through the page cache. The sklearn model is unpickled into
+# private buffers and is only shared copy-on-write with the preloading master.
 try:
-    df = pd.read_excel(DATASET_PATH)
-    print("✅ Dataset loaded successfully.")
-    print("📋 Columns:", list(df.columns))
-except FileNotFoundError:
-    print("❌ ERROR: dataset.xlsx not found.")
-    df = None
-
-if df is not None:
-    # Map shape to numeric
-    shape_map = {
-        'Hexagonal': 0,
-        'Circular': 1,
-        'Triangular': 2,
-        'Flat': 3,
-        'Concentric': 4
-    }
-    df['Shape_num'] = df['Shape'].map(shape_map)
-
-    feature_cols = [
-        'Shape_num',
-        'Intensity of Radiation (I) W/m2',
-        'Length of plate (L) m',
-        'Breadth/Base (B) m',
-        'Velocity of air (V) m/s',
-        'Temperature in (Ti) °C',
-        'Temperature out (To) °C',
-        'Ambient Temperature (Tamb) °C',
-        'Nusselt Number (Nu)',
-        'Distance Between Plate and Glass (x) m'
-    ]
-    target_cols = ['Qout', 'Qloss', 'Efficiency (%)']
-
-    X = df[feature_cols]
-    y = df[target_cols]
-
-    # 🔹 Normalize features for better learning
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X)
-
-    # 🔹 Random Forest Regressor (robust & nonlinear)
-    model = RandomForestRegressor(
-        n_estimators=200,
-        random_state=42,
-        max_depth=10,
-        min_samples_split=3
+    bundle = load_artifact(MODEL_PATH)
+    log.info("model artifact loaded version=%s path=%s", bundle["version"], MODEL_PATH)
+except (FileNotFoundError, ValueError) as e:
+    log.warning("could not load model artifact error=%s; training from dataset=%s", e, DATASET_PATH)
+    try:
+        # Same fixed-params fit as `train_model.py --no-search`
+        dataset = open_dataset(DATASET_PATH)
+        bundle = train_full(dataset, dataset_version(dataset), search=False)
+        log.info("model trained rows=%s", bundle["n_samples"])
+    except FileNotFoundError:
+        log.error("dataset not found path=%s", DATASET_PATH)
+        bundle = None
+
+
+# Everything a request needs from one artifact. A hot-swap replaces the whole
+# tuple with one assignment and every request reads `state` once, so no
+# request can mix the engine of one model with the ranges of another.
+ModelState = namedtuple("ModelState", [
+    "bundle", "version", "model", "scaler", "shape_map", "key_map", "feature_order",
+    "validation_ranges", "engine", "range_lo", "range_hi", "fast_engine", "fast_error_bound",
+])
+
+
+def build_state(new_bundle):
+    """Serving state for new_bundle (None = no model loaded)."""
+    if new_bundle is None:
+        range_lo, range_hi = range_arrays({}, KEY_MAP, FEATURE_ORDER)
+        return ModelState(None, None, None, None, {}, dict(KEY_MAP), list(FEATURE_ORDER),
+                          {}, None, range_lo, range_hi, None, None)
+
+    # FOREST_ENGINE=auto: flat NumPy engine (scaler folded in) up to
+    # FLAT_FOREST_MAX_ROWS rows, sklearn above; "flat" or "sklearn" pins one
+    forest_engine = os.environ.get("FOREST_ENGINE", "auto")
+    flat = FlatForest(new_bundle["flat_forest"])
+    sklearn = SklearnForest(new_bundle["model"], new_bundle["scaler"])
+    if forest_engine == "sklearn":
+        engine = sklearn
+    elif forest_engine == "flat":
+        engine = flat
+    else:
+        engine = RoutedForest(flat, sklearn, int(os.environ.get("FLAT_FOREST_MAX_ROWS", FLAT_MAX_ROWS)))
+    # Range bounds as arrays for vectorized validation
+    range_lo, range_hi = range_arrays(new_bundle["validation_ranges"], new_bundle["key_map"], new_bundle["feature_order"])
+    # Distilled surrogate for ?mode=fast (artifacts from before it existed have none)
+    surrogate = new_bundle.get("surrogate")
+
+    return ModelState(
+        bundle=new_bundle,
+        version=new_bundle["version"],
+        model=new_bundle["model"],
+        scaler=new_bundle["scaler"],
+        shape_map=new_bundle["shape_map"],
+        key_map=new_bundle["key_map"],
+        feature_order=new_bundle["feature_order"],
+        validation_ranges=new_bundle["validation_ranges"],
+        engine=engine,
+        range_lo=range_lo,
+        range_hi=range_hi,
+        fast_engine=FlatForest(surrogate["flat_forest"]) if surrogate else None,
+        fast_error_bound=surrogate["error_bound"] if surrogate else None,
     )
-    model.fit(X_scaled, y)
 
-    # Validation ranges for inputs
-    validation_ranges = {col: (df[col].min(), df[col].max()) for col in feature_cols[1:]}
 
-    print("✅ Model trained successfully on data:", X.shape)
-    print("📊 Sample prediction:", model.predict(X_scaled[:1]))
-else:
-    model = None
-    scaler = None
-    validation_ranges = {}
-    shape_map = {}
+state = build_state(bundle)
+del bundle
 
 
 # ================================
-# API Key Mapping (Frontend → Dataset)
+# Prediction Cache
 # ================================
-key_map = {
-    'solarRadiation': 'Intensity of Radiation (I) W/m2',
-    'collectorArea': 'Length of plate (L) m',
-    'massFlowRate': 'Breadth/Base (B) m',
-    'velocity': 'Velocity of air (V) m/s',
-    'inletTemp': 'Temperature in (Ti) °C',
-    'outletTemp': 'Temperature out (To) °C',
-    'ambientTemp': 'Ambient Temperature (Tamb) °C',
-    'nusselt': 'Nusselt Number (Nu)',
-    'distance': 'Distance Between Plate and Glass (x) m'
-}
+# PREDICTION_CACHE_SIZE=0 disables it; set PREDICTION_CACHE_DB to a file path
+# to share hits between gunicorn workers (capped at PREDICTION_CACHE_DB_ROWS).
+cache_db = os.environ.get("PREDICTION_CACHE_DB")
+prediction_cache = PredictionCache(
+    maxsize=int(os.environ.get("PREDICTION_CACHE_SIZE", 4096)),
+    ttl=float(os.environ.get("PREDICTION_CACHE_TTL", 300)),
+    precision=int(os.environ.get("PREDICTION_CACHE_PRECISION", 3)),
+    version=state.version,
+    shared=SqliteBackend(cache_db, max_rows=int(os.environ.get("PREDICTION_CACHE_DB_ROWS", 100_000))) if cache_db else None,
+)
+
+
+@app.route("/cache/stats")
+def cache_stats():
+    return jsonify(prediction_cache.stats())
+
+
+# ================================
+# Model Hot-swap
+# ================================
+# train_model.py publishes by atomically replacing MODEL_PATH. A background
+# thread in every worker looks at the file once per MODEL_RELOAD_INTERVAL
+# seconds (0 turns this off) and swaps to a new version without a restart, so
+# no request ever waits for an artifact to load. After a swap the new flat
+# arrays are still shared via mmap, but each worker holds its own copy of the
+# new sklearn forest.
+MODEL_RELOAD_INTERVAL = float(os.environ.get("MODEL_RELOAD_INTERVAL", 5))
+reload_lock = threading.Lock()
+watcher_lock = threading.Lock()
+watcher_pid = None
+
+
+def artifact_signature(path=MODEL_PATH):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+
+loaded_signature = artifact_signature()
+
+
+def reload_model():
+    """Activate a newly published artifact. Returns True when the model changed."""
+    global state, loaded_signature
+    with reload_lock:
+        signature = artifact_signature()
+        if signature is None or signature == loaded_signature:
+            return False
+        try:
+            new_bundle = load_artifact(MODEL_PATH)
+        except (OSError, ValueError, EOFError) as e:
+            log.warning("could not load new model artifact error=%s keeping=%s", e, state.version)
+            return False
+        loaded_signature = signature
+        if new_bundle["version"] == state.version:
+            return False
+
+        previous = state.version
+        state = build_state(new_bundle)
+        prediction_cache.set_version(state.version)
+        log.info("model hot-swapped from=%s to=%s", previous, state.version)
+        return True
+
+
+def watch_model():
+    while True:
+        time.sleep(MODEL_RELOAD_INTERVAL)
+        try:
+            reload_model()
+        except Exception:
+            log.exception("model reload check failed")
+
+
+@app.before_request
+def ensure_model_watcher():
+    """Start this worker's watcher thread on its first request.
+
+    Threads do not survive gunicorn's fork, so the preloading master can't
+    start it for the workers.
+    """
+    global watcher_pid
+    if MODEL_RELOAD_INTERVAL <= 0 or watcher_pid == os.getpid():
+        return
+    with watcher_lock:
+        if watcher_pid != os.getpid():
+            watcher_pid = os.getpid()
+            threading.Thread(target=watch_model, name="model-watcher", daemon=True).start()
+
+
+@app.route("/model")
+def model_info():
+    current = state
+    if current.bundle is None:
+        return fail("Model not loaded.", 500, "model_not_loaded")
+    return jsonify({
+        "version": current.version,
+        "n_samples": current.bundle["n_samples"],
+        "metrics": current.bundle.get("metrics", {}),
+    })
+
+
+@app.route("/model/reload", methods=["POST"])
+def model_reload():
+    swapped = reload_model()
+    return jsonify({"reloaded": swapped, "version": state.version})
+
+
+# ================================
+# Instrumentation
+# ================================
+# Set PROFILE_SLOW_MS to sample stacks of in-flight requests and dump those
+# slower than that as collapsed stacks (flamegraph.pl / speedscope) into PROFILE_DIR.
+profile_slow_ms = os.environ.get("PROFILE_SLOW_MS")
+profiler = SlowRequestProfiler(
+    threshold_ms=float(profile_slow_ms),
+    interval_ms=float(os.environ.get("PROFILE_INTERVAL_MS", 1)),
+    out_dir=os.environ.get("PROFILE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles")),
+) if profile_slow_ms else None
+
+metrics.register(Gauge(
+    "solar_model_info", "Active model artifact version.", ("version",),
+    lambda: {(str(state.version),): 1},
+))
+metrics.register(CounterFunc(
+    "solar_prediction_cache_events_total", "Prediction cache lookups and evictions.", ("event",),
+    lambda: {(k,): v for k, v in prediction_cache.stats().items()
+             if k in ("hits", "shared_hits", "misses", "evictions", "shared_errors")},
+))
+metrics.register(Gauge(
+    "solar_prediction_cache_size", "Entries in this worker's prediction cache.", (),
+    lambda: {(): prediction_cache.stats()["size"]},
+))
+
+
+def route_label():
+    """Route pattern rather than raw path, so label cardinality stays bounded."""
+    return request.url_rule.rule if request.url_rule else "unmatched"
+
+
+def stage(name):
+    return stage_seconds.time(route_label(), name)
+
+
+def fail(message, status, error_type):
+    g.error_type = error_type
+    return jsonify({"error": message}), status
+
+
+def select_engine(current, mode):
+    """Model tier of state `current` for a ?mode= value → (engine, extra response fields).
+
+    mode=fast uses the distilled surrogate and reports its error bound
+    relative to the full model. Raises ValueError for an unusable mode.
+    """
+    if mode == "full":
+        return current.engine, {}
+    if mode == "fast":
+        if current.fast_engine is None:
+            raise ValueError("Fast mode is not available for this model artifact. Re-run train_model.py.")
+        return current.fast_engine, {"mode": "fast", "error_bound": current.fast_error_bound}
+    raise ValueError("mode must be 'full' or 'fast'")
+
+
+@app.before_request
+def start_request_timer():
+    g.started = time.perf_counter()
+    if profiler is not None:
+        g.profile_started = profiler.start_request()
+
+
+@app.after_request
+def record_request(response):
+    endpoint = route_label()
+    # Streamed responses are timed by instrumented_stream once fully sent
+    if not g.get("streaming"):
+        request_seconds.observe(time.perf_counter() - g.started, endpoint)
+    requests_total.inc(endpoint, request.method, str(response.status_code))
+    if response.status_code >= 400:
+        errors_total.inc(endpoint, g.get("error_type", f"http_{response.status_code}"))
+    return response
+
+
+@app.teardown_request
+def finish_profile(_exc):
+    if profiler is not None and "profile_started" in g and not g.get("streaming"):
+        end_profile(g.profile_started, route_label())
+
+
+def end_profile(profile_started, endpoint):
+    path = profiler.end_request(profile_started, endpoint)
+    if path:
+        log.warning("slow request endpoint=%s stacks=%s", endpoint, path)
+
+
+def instrumented_stream(lines):
+    """Wrap a streamed body so latency, errors and the slow-request profile cover the whole stream.
+
+    after_request / teardown_request run before the server starts pulling the
+    generator, which it then consumes on the same worker thread.
+    """
+    g.streaming = True
+    endpoint = route_label()
+    started = g.started
+    profile_started = g.get("profile_started")
+
+    def generate():
+        try:
+            yield from lines
+        except Exception as e:
+            errors_total.inc(endpoint, type(e).__name__)
+            log.exception("stream failed endpoint=%s", endpoint)
+            raise
+        finally:
+            request_seconds.observe(time.perf_counter() - started, endpoint)
+            if profiler is not None and profile_started is not None:
+                end_profile(profile_started, endpoint)
+
+    return generate()
+
+
+@app.route("/metrics")
+def prometheus_metrics():
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
 
 
 # ================================
@@ -105,78 +357,194 @@ key_map = {
 @app.route("/predict", methods=["POST"])
 def predict():
     try:
-        if model is None:
-            return jsonify({"error": "Model not loaded. Ensure dataset.xlsx is present."}), 500
-
-        data = request.get_json()
-        if not data:
-            return jsonify({"error": "No input data provided."}), 400
-
-        # Convert shape to numeric
-        shape = shape_map.get(data.get("shape"))
-        if shape is None:
-            return jsonify({"error": f"Invalid shape. Choose from {list(shape_map.keys())}"}), 400
-
-        # Ensure correct feature order
-        feature_order = [
-            'solarRadiation',    # → Intensity of Radiation (I) W/m2
-            'collectorArea',     # → Length of plate (L) m
-            'massFlowRate',      # → Breadth/Base (B) m
-            'velocity',          # → Velocity of air (V) m/s
-            'inletTemp',         # → Temperature in (Ti) °C
-            'outletTemp',        # → Temperature out (To) °C
-            'ambientTemp',       # → Ambient Temperature (Tamb) °C
-            'nusselt',           # → Nusselt Number (Nu)
-            'distance'           # → Distance Between Plate and Glass (x) m
-        ]
-
-        # Build input in the same order as model training
-        values = []
-        for key in feature_order:
-            val = data.get(key)
-            if val is None:
-                return jsonify({"error": f"Missing value for {key}"}), 400
-
-            val = float(val)
-            dataset_key = key_map[key]
-
-            # Validate against dataset min-max
-            min_val, max_val = validation_ranges.get(dataset_key, (None, None))
-            if min_val is not None and not (min_val <= val <= max_val):
-                return jsonify({
-                    "error": f"{key} should be between {round(min_val, 2)} and {round(max_val, 2)}"
-                }), 400
-
-            values.append(val)
+        current = state
+        if current.model is None:
+            return fail("Model not loaded. Run train_model.py or ensure dataset.xlsx is present.", 500, "model_not_loaded")
+
+        with stage("parse"):
+            data = request.get_json(silent=True)
+        if not data or not isinstance(data, dict):
+            return fail("No input data provided.", 400, "no_input")
+
+        # Shape → numeric, then the features in model training order
+        with stage("validate"):
+            row, error = validate_record(data, current.shape_map, current.feature_order, current.range_lo, current.range_hi)
+        if error:
+            return fail(error, 400, "validation")
+
+        try:
+            tier, extra = select_engine(current, request.args.get("mode", "full"))
+        except ValueError as e:
+            return fail(str(e), 400, "bad_mode")
 
         # ================================
         # Prediction Logic
         # ================================
-        X_input = np.array([[shape] + values])
-        X_scaled_input = scaler.transform(X_input)
-        pred = model.predict(X_scaled_input)[0]
+        # Nearly identical inputs share one cache entry (and one prediction);
+        # the fast tier is cheap enough to skip it
+        predicted_values = None
+        if prediction_cache.enabled and tier is current.engine:
+            with stage("cache"):
+                row = prediction_cache.quantize(row[0], row[1:])
+                predicted_values = prediction_cache.get(row)
 
-        Qout, Qloss, Efficiency = map(lambda x: round(float(x), 2), pred.tolist())
+        if predicted_values is None:
+            # Scaling is folded into the flat forest, so this is the whole model
+            with stage("inference"):
+                pred = tier.predict(np.array([row]))[0]
+            rows_total.inc("/predict")
 
-        # Clamp efficiency to realistic range
-        Efficiency = max(0, min(Efficiency, 80))
+            Qout, Qloss, Efficiency = map(lambda x: round(float(x), 2), pred.tolist())
 
-        # Debug prints to verify variability
-        print("🔥 Input Vector:", [shape] + values)
-        print("📈 Scaled Input:", scaler.transform([[shape] + values])[0])
-        print("📊 Prediction Output:", Qout, Qloss, Efficiency)
+            # Clamp efficiency to realistic range
+            Efficiency = max(0, min(Efficiency, 80))
 
-        return jsonify({
-            "predicted_values": {
+            predicted_values = {
                 "Qout": Qout,
                 "Qloss": Qloss,
                 "Efficiency(%)": Efficiency
             }
-        }), 200
+            if prediction_cache.enabled and tier is current.engine:
+                # Tagged with the version that produced it; dropped if a swap happened meanwhile
+                prediction_cache.put(row, predicted_values, current.version)
+
+        log.debug("prediction input=%s output=%s", row, predicted_values)
+
+        with stage("serialize"):
+            response = jsonify({"predicted_values": predicted_values, **extra})
+        return response, 200
+
+    except RequestEntityTooLarge:
+        raise
+    except Exception as e:
+        log.exception("prediction failed")
+        return fail(f"Internal Server Error: {str(e)}", 500, type(e).__name__)
+
+
+# ================================
+# Batch Prediction Endpoint
+# ================================
+MAX_BATCH_ROWS = int(os.environ.get("MAX_BATCH_ROWS", 100000))
+# Bodies are parsed whole, so cap their size up front (~1 KiB per row covers
+# JSON, CSV and Arrow); larger uploads get a 413 before any parsing
+app.config["MAX_CONTENT_LENGTH"] = int(os.environ.get("MAX_REQUEST_BYTES", MAX_BATCH_ROWS * 1024))
+
+
+@app.errorhandler(RequestEntityTooLarge)
+def body_too_large(_e):
+    return fail(f"Request body too large. Send at most {app.config['MAX_CONTENT_LENGTH']} bytes.", 413, "too_large")
+
+
+@app.route("/predict/batch", methods=["POST"])
+def predict_batch():
+    try:
+        current = state
+        if current.model is None:
+            return fail("Model not loaded. Run train_model.py or ensure dataset.xlsx is present.", 500, "model_not_loaded")
+
+        # Accept a JSON array, CSV with a header row, or an Arrow IPC stream
+        content_type = request.mimetype
+        try:
+            with stage("parse"):
+                if content_type == "text/csv":
+                    df = frame_from_csv(request.get_data())
+                elif content_type == "application/vnd.apache.arrow.stream":
+                    df = frame_from_arrow(request.get_data())
+                else:
+                    df = frame_from_json(request.get_json(silent=True))
+        except ValueError as e:
+            return fail(str(e), 400, "bad_body")
+
+        try:
+            tier, extra = select_engine(current, request.args.get("mode", "full"))
+        except ValueError as e:
+            return fail(str(e), 400, "bad_mode")
+
+        if len(df) == 0:
+            return fail("No input data provided.", 400, "no_input")
+        if len(df) > MAX_BATCH_ROWS:
+            return fail(f"Batch too large. Send at most {MAX_BATCH_ROWS} rows.", 413, "too_large")
+
+        with stage("validate"):
+            X, errors = frame_to_matrix(df, current.shape_map, current.feature_order, current.range_lo, current.range_hi)
+            ok = [i for i, err in enumerate(errors) if err is None]
+
+        # Single forest pass over every valid row
+        results = [{"error": err} for err in errors]
+        if ok:
+            with stage("inference"):
+                pred = predict_matrix(tier, X[ok])
+            rows_total.inc("/predict/batch", amount=len(ok))
+            for i, values in zip(ok, format_predictions(pred)):
+                results[i] = {"predicted_values": values}
+
+        with stage("serialize"):
+            response = jsonify({
+                "results": results,
+                "n_ok": len(ok),
+                "n_errors": len(results) - len(ok),
+                **extra
+            })
+        return response, 200
+
+    except RequestEntityTooLarge:
+        raise
+    except Exception as e:
+        log.exception("batch prediction failed")
+        return fail(f"Internal Server Error: {str(e)}", 500, type(e).__name__)
+
+
+# ================================
+# Parameter Sweep Endpoint
+# ================================
+MAX_SWEEP_POINTS = int(os.environ.get("MAX_SWEEP_POINTS", 10_000_000))
+SWEEP_CHUNK_ROWS = int(os.environ.get("SWEEP_CHUNK_ROWS", 10000))
+
+
+@app.route("/sweep", methods=["POST"])
+def sweep():
+    """Stream predictions over a grid of inputs as NDJSON.
+
+    Body: {"shape": [...], "params": {key: number | [values] | {"start", "stop", "num" | "step"}},
+           "top_k": 10, "objective": "Efficiency" | "Qout", "stream_rows": true}
+    """
+    try:
+        current = state
+        if current.model is None:
+            return fail("Model not loaded. Run train_model.py or ensure dataset.xlsx is present.", 500, "model_not_loaded")
+
+        with stage("parse"):
+            spec = request.get_json(silent=True)
+        try:
+            axes = build_axes(spec, current.shape_map, current.feature_order, current.range_lo, current.range_hi, MAX_SWEEP_POINTS)
+            top_k = int(spec.get("top_k", 0))
+            objective = spec.get("objective", "Efficiency")
+            if objective not in OBJECTIVES:
+                raise ValueError(f"objective must be one of {list(OBJECTIVES)}")
+            if not 0 <= top_k <= 1000:
+                raise ValueError("top_k must be between 0 and 1000")
+            stream_rows = spec.get("stream_rows", True)
+            if not isinstance(stream_rows, bool):
+                raise ValueError("stream_rows must be true or false")
+            tier, extra = select_engine(current, request.args.get("mode", "full"))
+        except (TypeError, ValueError, OverflowError) as e:
+            return fail(str(e), 400, "validation")
+
+        lines = sweep_lines(
+            tier, axes, current.shape_map, current.feature_order,
+            chunk_size=SWEEP_CHUNK_ROWS,
+            top_k=top_k,
+            objective=objective,
+            stream_rows=stream_rows,
+            summary_extra=extra,
+        )
+        return Response(instrumented_stream(lines), mimetype="application/x-ndjson")
 
+    except RequestEntityTooLarge:
+        raise
     except Exception as e:
-        print("❌ Prediction Error:", str(e))
-        return jsonify({"error": f"Internal Server Error: {str(e)}"}), 500
+        log.exception("sweep failed")
+        return fail(f"Internal Server Error: {str(e)}", 500, type(e).__name__)
 
 
 # ================================
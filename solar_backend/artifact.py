@@ -0,0 +1,119 @@
+import os
+import pickle
+import shutil
+
+import joblib
+import sklearn
+
+# ================================
+# Paths
+# ================================
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATASET_PATH = os.environ.get("DATASET_PATH", os.path.join(BASE_DIR, "dataset.xlsx"))
+MODEL_PATH = os.environ.get("MODEL_PATH", os.path.join(BASE_DIR, "solar_model.pkl"))
+# Every published version is also kept here, so a bad model can be rolled back
+ARTIFACT_DIR = os.environ.get("ARTIFACT_DIR", os.path.join(BASE_DIR, "artifacts"))
+
+# Bumped whenever the layout of the bundle below changes.
+ARTIFACT_FORMAT = 2
+
+
+# ================================
+# Feature Schema (shared by training and serving)
+# ================================
+SHAPE_MAP = {
+    'Hexagonal': 0,
+    'Circular': 1,
+    'Triangular': 2,
+    'Flat': 3,
+    'Concentric': 4
+}
+
+FEATURE_COLS = [
+    'Shape_num',
+    'Intensity of Radiation (I) W/m2',
+    'Length of plate (L) m',
+    'Breadth/Base (B) m',
+    'Velocity of air (V) m/s',
+    'Temperature in (Ti) °C',
+    'Temperature out (To) °C',
+    'Ambient Temperature (Tamb) °C',
+    'Nusselt Number (Nu)',
+    'Distance Between Plate and Glass (x) m'
+]
+TARGET_COLS = ['Qout', 'Qloss', 'Efficiency (%)']
+
+# Frontend key → dataset column
+KEY_MAP = {
+    'solarRadiation': 'Intensity of Radiation (I) W/m2',
+    'collectorArea': 'Length of plate (L) m',
+    'massFlowRate': 'Breadth/Base (B) m',
+    'velocity': 'Velocity of air (V) m/s',
+    'inletTemp': 'Temperature in (Ti) °C',
+    'outletTemp': 'Temperature out (To) °C',
+    'ambientTemp': 'Ambient Temperature (Tamb) °C',
+    'nusselt': 'Nusselt Number (Nu)',
+    'distance': 'Distance Between Plate and Glass (x) m'
+}
+
+# Request keys in the same order as FEATURE_COLS[1:]
+FEATURE_ORDER = [
+    'solarRadiation',
+    'collectorArea',
+    'massFlowRate',
+    'velocity',
+    'inletTemp',
+    'outletTemp',
+    'ambientTemp',
+    'nusselt',
+    'distance'
+]
+
+
+# ================================
+# Save / Load
+# ================================
+def save_artifact(bundle, path=MODEL_PATH):
+    """Write the bundle uncompressed so its arrays can be memory-mapped on load."""
+    tmp_path = path + ".tmp"
+    joblib.dump(bundle, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def publish_artifact(bundle, path=MODEL_PATH, archive_dir=ARTIFACT_DIR):
+    """Archive the bundle under its version, then atomically make it the current artifact.
+
+    Running servers notice the replaced file and hot-swap to it (see app.py).
+    """
+    os.makedirs(archive_dir, exist_ok=True)
+    archive_path = os.path.join(archive_dir, f"solar_model-{bundle['version']}.pkl")
+    save_artifact(bundle, archive_path)
+    tmp_path = path + ".tmp"
+    shutil.copyfile(archive_path, tmp_path)
+    os.replace(tmp_path, path)
+    return archive_path
+
+
+def load_artifact(path=MODEL_PATH, mmap_mode="r"):
+    """Load a bundle written by train_model.py.
+
+    With mmap_mode="r" the flat_forest (and surrogate) arrays come back as
+    np.memmap backed by the page cache, so all workers share them. sklearn's
+    Tree.__setstate__ copies the estimators' node arrays into private memory,
+    so the sklearn model is never mapped.
+    The bundle pickles sklearn objects, so one written by another sklearn
+    version (or one that no longer unpickles at all) raises ValueError like
+    any other stale artifact.
+    """
+    try:
+        bundle = joblib.load(path, mmap_mode=mmap_mode)
+    except (AttributeError, ImportError, EOFError, pickle.UnpicklingError) as e:
+        raise ValueError(f"{path} could not be unpickled ({e!r}). Re-run train_model.py.")
+    if not isinstance(bundle, dict) or bundle.get("format") != ARTIFACT_FORMAT:
+        raise ValueError(f"{path} is not a format {ARTIFACT_FORMAT} model artifact. Re-run train_model.py.")
+    if bundle.get("sklearn_version") != sklearn.__version__:
+        raise ValueError(
+            f"{path} was built with scikit-learn {bundle.get('sklearn_version')}, "
+            f"this is {sklearn.__version__}. Re-run train_model.py."
+        )
+    return bundle
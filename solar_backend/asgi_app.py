@@ -0,0 +1,161 @@
+"""ASGI serving mode: same / and /predict contract as app.py, with micro-batching.
+
+    uvicorn asgi_app:app --host 0.0.0.0 --port 10000
+
+Concurrent /predict requests are collected for MICROBATCH_WINDOW_MS (or
+until MICROBATCH_MAX_ROWS rows) and the forest runs once per batch in a
+thread pool of MICROBATCH_WORKERS, so the event loop stays free while the
+model works. Model loading, validation and the prediction cache are shared
+with app.py. ?mode=fast requests skip the batcher: the distilled surrogate
+is cheap enough to run inline.
+
+Nothing that can block runs on the event loop: a background task checks for
+a newly published artifact every MODEL_RELOAD_INTERVAL seconds in a thread,
+and with PREDICTION_CACHE_DB set the (SQLite-backed) cache lookups and
+writes go to a thread as well.
+"""
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+
+import numpy as np
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
+
+import app as service
+import metrics
+from inference import format_predictions, validate_record
+from metrics import errors_total, request_seconds, requests_total, rows_total, stage_seconds
+from microbatch import MicroBatcher
+
+batcher = MicroBatcher(
+    # Looked up per batch, so a model swapped into app.py is picked up. A batch
+    # always runs on a state at least as new as its requests saw, and a request
+    # whose state was replaced meanwhile has its cache write dropped
+    lambda X: service.state.engine.predict(X),
+    window_ms=float(os.environ.get("MICROBATCH_WINDOW_MS", 2)),
+    max_rows=int(os.environ.get("MICROBATCH_MAX_ROWS", 256)),
+    workers=int(os.environ.get("MICROBATCH_WORKERS", 1)),
+)
+
+
+async def watch_model():
+    """Hot-swap check of app.py, off the request path and off the event loop."""
+    while True:
+        await asyncio.sleep(service.MODEL_RELOAD_INTERVAL)
+        try:
+            await asyncio.to_thread(service.reload_model)
+        except Exception:
+            service.log.exception("model reload check failed")
+
+
+async def cache_call(method, *args):
+    """Run a prediction cache method; in a thread when it may hit the shared backend."""
+    if service.prediction_cache.shared is None:
+        return method(*args)
+    return await asyncio.to_thread(method, *args)
+
+
+@asynccontextmanager
+async def lifespan(_):
+    await batcher.start()
+    watcher = asyncio.create_task(watch_model()) if service.MODEL_RELOAD_INTERVAL > 0 else None
+    yield
+    if watcher is not None:
+        watcher.cancel()
+    await batcher.stop()
+
+
+app = FastAPI(title="Solar Backend API", lifespan=lifespan)
+app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
+
+
+@app.middleware("http")
+async def record_request(request: Request, call_next):
+    started = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    endpoint = route.path if route is not None else "unmatched"
+    request_seconds.observe(time.perf_counter() - started, endpoint)
+    requests_total.inc(endpoint, request.method, str(response.status_code))
+    if response.status_code >= 400:
+        errors_total.inc(endpoint, getattr(request.state, "error_type", f"http_{response.status_code}"))
+    return response
+
+
+def fail(request, message, status, error_type):
+    request.state.error_type = error_type
+    return JSONResponse({"error": message}, status)
+
+
+@app.get("/")
+async def home():
+    return {
+        "message": "✅ Solar Backend API is live!",
+        "usage": "Send a POST request to /predict with JSON data."
+    }
+
+
+@app.get("/microbatch/stats")
+async def microbatch_stats():
+    return batcher.stats()
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@app.post("/predict")
+async def predict(request: Request):
+    try:
+        current = service.state
+        if current.model is None:
+            return fail(request, "Model not loaded. Run train_model.py or ensure dataset.xlsx is present.", 500, "model_not_loaded")
+
+        with stage_seconds.time("/predict", "parse"):
+            try:
+                data = await request.json()
+            except ValueError:
+                data = None
+        if not data or not isinstance(data, dict):
+            return fail(request, "No input data provided.", 400, "no_input")
+
+        with stage_seconds.time("/predict", "validate"):
+            row, error = validate_record(data, current.shape_map, current.feature_order, current.range_lo, current.range_hi)
+        if error:
+            return fail(request, error, 400, "validation")
+
+        try:
+            tier, extra = service.select_engine(current, request.query_params.get("mode", "full"))
+        except ValueError as e:
+            return fail(request, str(e), 400, "bad_mode")
+        if tier is not current.engine:
+            with stage_seconds.time("/predict", "inference"):
+                pred = tier.predict(np.array([row]))
+            rows_total.inc("/predict")
+            return {"predicted_values": format_predictions(pred)[0], **extra}
+
+        cache = service.prediction_cache
+        if cache.enabled:
+            with stage_seconds.time("/predict", "cache"):
+                row = cache.quantize(row[0], row[1:])
+                cached = await cache_call(cache.get, row)
+            if cached is not None:
+                return {"predicted_values": cached}
+
+        # Includes the wait for the micro-batch window to close
+        with stage_seconds.time("/predict", "inference"):
+            pred = await batcher.submit(row)
+        rows_total.inc("/predict")
+        predicted_values = format_predictions(pred.reshape(1, -1))[0]
+        if cache.enabled:
+            await cache_call(cache.put, row, predicted_values, current.version)
+        service.log.debug("prediction input=%s output=%s", row, predicted_values)
+        return {"predicted_values": predicted_values}
+
+    except Exception as e:
+        service.log.exception("prediction failed")
+        return fail(request, f"Internal Server Error: {str(e)}", 500, type(e).__name__)
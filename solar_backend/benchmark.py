@@ -0,0 +1,422 @@
+"""Benchmarks for the solar backend.
+
+Usage:
+    python benchmark.py coldstart [--workers N]
+    python benchmark.py batch [--rows N]
+    python benchmark.py engine
+    python benchmark.py sweep [--points N]
+    python benchmark.py dataset
+    python benchmark.py load [--concurrency C] [--requests N]
+    python benchmark.py surrogate [--sizes TREESxDEPTH ...]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+# ================================
+# Helpers
+# ================================
+def run_child(code, env=None):
+    """Run a Python snippet in a fresh interpreter and return its last stdout line as JSON."""
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=BASE_DIR,
+        env={**os.environ, **(env or {})},
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def load_app():
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app
+    return app
+
+
+def random_matrix(app, n, seed=0):
+    """n model input rows drawn uniformly from the shapes x validation box."""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    shapes = rng.choice(list(app.state.shape_map.values()), size=n)
+    lo, hi = app.state.range_lo, app.state.range_hi
+    return np.column_stack([shapes, lo + rng.random((n, len(lo))) * (hi - lo)])
+
+
+def random_rows(app, n, seed=0):
+    """n request bodies drawn uniformly from the validation box."""
+    shape_names = {code: name for name, code in app.state.shape_map.items()}
+    return [
+        {"shape": shape_names[int(row[0])], **dict(zip(app.state.feature_order, row[1:]))}
+        for row in random_matrix(app, n, seed).tolist()
+    ]
+
+
+def time_call(fn, min_time=0.5):
+    """Mean seconds per call, repeating until min_time has elapsed."""
+    fn()
+    calls, started = 0, time.perf_counter()
+    while True:
+        fn()
+        calls += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time:
+            return elapsed / calls
+
+
+def memory_kb():
+    """Return (rss, pss, private) for the current process in kB (Linux only)."""
+    fields = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[1].isdigit():
+                fields[parts[0].rstrip(":")] = int(parts[1])
+    private = fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+    return fields.get("Rss", 0), fields.get("Pss", 0), private
+
+
+# ================================
+# Cold start
+# ================================
+# Each worker either imports app.py itself (no preload) or is forked from a
+# master that already imported it (gunicorn preload_app). Workers touch the
+# model with one prediction so lazily mapped pages are counted too.
+COLDSTART_CHILD = r'''
+import contextlib, io, json, os, sys, time
+sys.path.insert(0, ".")
+from benchmark import memory_kb
+
+WORKERS = int(os.environ["BENCH_WORKERS"])
+PRELOAD = os.environ["BENCH_PRELOAD"] == "1"
+
+def boot():
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app
+    return app, time.perf_counter() - started
+
+def worker(app, boot_s, w):
+    app.state.engine.predict([[0] + [lo for lo, _ in app.state.validation_ranges.values()]])
+    os.write(w, (json.dumps([boot_s, *memory_kb()]) + "\n").encode())
+    os._exit(0)
+
+if PRELOAD:
+    app, boot_s = boot()
+
+r, w = os.pipe()
+pids = []
+for _ in range(WORKERS):
+    pid = os.fork()
+    if pid == 0:
+        os.close(r)
+        if not PRELOAD:
+            app, boot_s = boot()
+        worker(app, boot_s, w)
+    pids.append(pid)
+os.close(w)
+with os.fdopen(r) as f:
+    rows = [json.loads(line) for line in f]
+for pid in pids:
+    os.waitpid(pid, 0)
+print(json.dumps(rows))
+'''
+
+
+def bench_coldstart(args):
+    scenarios = [
+        ("retrain at boot (old path)", {"MODEL_PATH": os.path.join(BASE_DIR, "missing-model.pkl"), "BENCH_PRELOAD": "0"}),
+        ("load artifact per worker", {"BENCH_PRELOAD": "0"}),
+        ("load artifact + preload", {"BENCH_PRELOAD": "1"}),
+    ]
+    print(f"{'scenario':<30}{'boot s':>10}{'RSS MB':>10}{'PSS MB':>10}{'private MB':>12}")
+    for name, env in scenarios:
+        rows = run_child(COLDSTART_CHILD, {**env, "BENCH_WORKERS": str(args.workers)})
+        n = len(rows)
+        boot_s, rss, pss, private = (sum(col) / n for col in zip(*rows))
+        print(f"{name:<30}{boot_s:>10.3f}{rss / 1024:>10.1f}{pss / 1024:>10.1f}{private / 1024:>12.1f}")
+
+
+# ================================
+# Batch vs per-row /predict
+# ================================
+def bench_batch(args):
+    app = load_app()
+    client = app.app.test_client()
+    rows = random_rows(app, args.rows)
+
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for row in rows:
+            client.post("/predict", json=row)
+    loop_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    client.post("/predict/batch", json=rows)
+    batch_s = time.perf_counter() - started
+
+    print(f"{'path':<24}{'total s':>10}{'rows/s':>12}")
+    print(f"{'loop over /predict':<24}{loop_s:>10.3f}{args.rows / loop_s:>12.0f}")
+    print(f"{'/predict/batch':<24}{batch_s:>10.3f}{args.rows / batch_s:>12.0f}")
+    print(f"speedup: {loop_s / batch_s:.1f}x")
+
+
+# ================================
+# Flat forest engine vs sklearn
+# ================================
+def bench_engine(args):
+    import numpy as np
+    from forest_engine import FlatForest, RoutedForest, SklearnForest
+
+    app = load_app()
+    flat = FlatForest(app.state.bundle["flat_forest"])
+    sk = SklearnForest(app.state.model, app.state.scaler)
+    routed = RoutedForest(flat, sk)
+
+    X = random_matrix(app, max(args.sizes))
+    drift = np.abs(flat.predict(X) - sk.predict(X)).max(axis=0)
+    print("max |flat - sklearn|:", dict(zip(app.state.bundle["target_cols"], drift.tolist())))
+
+    print(f"{'rows':>8}{'sklearn ms':>14}{'flat ms':>12}{'routed ms':>12}{'speedup':>10}")
+    for n in args.sizes:
+        sk_s = time_call(lambda: sk.predict(X[:n]))
+        flat_s = time_call(lambda: flat.predict(X[:n]))
+        routed_s = time_call(lambda: routed.predict(X[:n]))
+        print(f"{n:>8}{sk_s * 1e3:>14.3f}{flat_s * 1e3:>12.3f}{routed_s * 1e3:>12.3f}{sk_s / routed_s:>9.1f}x")
+
+
+# ================================
+# Streaming /sweep
+# ================================
+def bench_sweep(args):
+    import resource
+
+    app = load_app()
+    client = app.app.test_client()
+    # Split the requested size across radiation x plate length x inlet temperature
+    side = max(1, round((args.points / len(app.state.shape_map)) ** (1 / 3)))
+    params = {key: float(lo) for key, lo in zip(app.state.feature_order, app.state.range_lo)}
+    for key in ("solarRadiation", "collectorArea", "inletTemp"):
+        params[key] = {"num": side}
+    body = {"params": params, "top_k": 10, "stream_rows": not args.summary_only}
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    response = client.post("/sweep", json=body, buffered=False)
+    nbytes = 0
+    for chunk in response.iter_encoded():
+        nbytes += len(chunk)
+    points = json.loads(chunk.decode().splitlines()[-1])["summary"]["points"]
+    elapsed = time.perf_counter() - started
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    print(f"points: {points}  streamed: {nbytes / 1e6:.1f} MB  time: {elapsed:.2f}s  ({points / elapsed:,.0f} points/s)")
+    print(f"peak RSS growth: {(rss_after - rss_before) / 1024:.1f} MB")
+
+
+# ================================
+# Excel vs columnar dataset cache
+# ================================
+def bench_dataset(args):
+    import tempfile
+
+    import pandas as pd
+    from artifact import DATASET_PATH
+    from dataset import open_dataset
+    from train_model import TRAINING_COLS
+
+    excel_s = time_call(lambda: pd.read_excel(DATASET_PATH))
+    with tempfile.TemporaryDirectory() as cache_dir:
+        started = time.perf_counter()
+        open_dataset(DATASET_PATH, cache_dir)
+        build_s = time.perf_counter() - started
+        warm_s = time_call(lambda: open_dataset(DATASET_PATH, cache_dir).frame(TRAINING_COLS))
+
+    print(f"{'path':<36}{'ms':>10}")
+    print(f"{'pd.read_excel':<36}{excel_s * 1e3:>10.2f}")
+    print(f"{'columnar cache build (first run)':<36}{build_s * 1e3:>10.2f}")
+    print(f"{'columnar cache, training columns':<36}{warm_s * 1e3:>10.2f}")
+
+
+# ================================
+# Load test: Flask vs ASGI micro-batching
+# ================================
+LOAD_SERVERS = {
+    "flask (gunicorn, 1 worker x 8 threads)": [
+        sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py",
+        "--workers", "1", "--threads", "8", "-b", "127.0.0.1:{port}", "app:app",
+    ],
+    "asgi (uvicorn, 1 worker, micro-batching)": [
+        sys.executable, "-m", "uvicorn", "asgi_app:app", "--host", "127.0.0.1", "--port", "{port}",
+        "--log-level", "warning", "--no-access-log",
+    ],
+}
+
+
+def wait_for_port(port, timeout=60):
+    import socket
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+def drive_load(port, bodies, concurrency):
+    """POST every body to /predict from `concurrency` keep-alive clients → (latencies, wall seconds)."""
+    import http.client
+    import threading
+
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    chunks = [bodies[i::concurrency] for i in range(concurrency)]
+
+    def client(chunk):
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        mine = []
+        for body in chunk:
+            started = time.perf_counter()
+            conn.request("POST", "/predict", body=body, headers={"Content-Type": "application/json"})
+            response = conn.getresponse()
+            response.read()
+            mine.append(time.perf_counter() - started)
+            if response.status != 200:
+                errors.append(response.status)
+        conn.close()
+        with lock:
+            latencies.extend(mine)
+
+    threads = [threading.Thread(target=client, args=(chunk,)) for chunk in chunks]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    if errors:
+        raise RuntimeError(f"{len(errors)} requests failed, e.g. HTTP {errors[0]}")
+    return latencies, time.perf_counter() - started
+
+
+def bench_load(args):
+    import numpy as np
+
+    app = load_app()
+    bodies = [json.dumps(row) for row in random_rows(app, args.requests)]
+    env = {**os.environ, "PREDICTION_CACHE_SIZE": "0"}  # measure the model, not the cache
+
+    print(f"{args.requests} requests, {args.concurrency} concurrent clients")
+    print(f"{'server':<44}{'p50 ms':>10}{'p99 ms':>10}{'req/s':>10}")
+    for port, (name, cmd) in enumerate(LOAD_SERVERS.items(), start=args.port):
+        server = subprocess.Popen(
+            [part.format(port=port) for part in cmd],
+            cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            wait_for_port(port)
+            drive_load(port, bodies[:args.concurrency * 2], args.concurrency)  # warm-up
+            latencies, wall = drive_load(port, bodies, args.concurrency)
+        finally:
+            server.terminate()
+            server.wait()
+        p50, p99 = np.percentile(latencies, [50, 99]) * 1e3
+        print(f"{name:<44}{p50:>10.2f}{p99:>10.2f}{len(latencies) / wall:>10.0f}")
+
+
+# ================================
+# Fast Surrogate: Latency vs Accuracy
+# ================================
+def bench_surrogate(args):
+    import numpy as np
+    from forest_engine import FlatForest
+    from surrogate import SURROGATE_PARAMS, build_surrogate
+
+    # Prediction cache off so the end-to-end /predict comparison hits the model
+    os.environ["PREDICTION_CACHE_SIZE"] = "0"
+    app = load_app()
+    full = FlatForest(app.state.bundle["flat_forest"])
+    X = random_matrix(app, 1000, seed=1)
+    shape_codes = list(app.state.shape_map.values())
+
+    print(f"{'model':<22}{'fit s':>8}{'1 row ms':>10}{'100 rows ms':>13}"
+          f"{'MAE Qout':>10}{'MAE Qloss':>11}{'MAE Eff':>9}{'max Eff':>9}")
+    print(f"{'full ({} trees)'.format(app.state.bundle['flat_forest']['n_trees']):<22}{'':>8}"
+          f"{time_call(lambda: full.predict(X[:1])) * 1e3:>10.3f}"
+          f"{time_call(lambda: full.predict(X[:100])) * 1e3:>13.3f}")
+    for size in args.sizes:
+        trees, depth = map(int, size.split("x"))
+        params = {**SURROGATE_PARAMS, "n_estimators": trees, "max_depth": depth}
+        surrogate = build_surrogate(full, shape_codes, app.state.range_lo, app.state.range_hi, params)
+        fast = FlatForest(surrogate["flat_forest"])
+        mean_abs, max_abs = surrogate["error_bound"]["mean_abs"], surrogate["error_bound"]["max_abs"]
+        marker = " *" if params == SURROGATE_PARAMS else ""
+        print(f"{f'{trees} trees, depth {depth}{marker}':<22}{surrogate['fit_seconds']:>8.2f}"
+              f"{time_call(lambda: fast.predict(X[:1])) * 1e3:>10.3f}"
+              f"{time_call(lambda: fast.predict(X[:100])) * 1e3:>13.3f}"
+              f"{mean_abs['Qout']:>10.2f}{mean_abs['Qloss']:>11.2f}"
+              f"{mean_abs['Efficiency(%)']:>9.3f}{max_abs['Efficiency(%)']:>9.3f}")
+    print("* shipped as ?mode=fast (SURROGATE_PARAMS)")
+
+    # End to end through /predict
+    client = app.app.test_client()
+    body = random_rows(app, 1)[0]
+    for mode in ("full", "fast"):
+        elapsed = time_call(lambda: client.post(f"/predict?mode={mode}", json=body))
+        print(f"/predict?mode={mode}: {elapsed * 1e3:.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("coldstart", help="boot time and per-worker memory of app.py")
+    p.add_argument("--workers", type=int, default=4)
+    p.set_defaults(func=bench_coldstart)
+
+    p = sub.add_parser("batch", help="throughput of /predict/batch vs looping over /predict")
+    p.add_argument("--rows", type=int, default=1000)
+    p.set_defaults(func=bench_batch)
+
+    p = sub.add_parser("engine", help="flat forest engine latency and parity vs sklearn")
+    p.add_argument("--sizes", type=int, nargs="+", default=[1, 100, 1000, 10000])
+    p.set_defaults(func=bench_engine)
+
+    p = sub.add_parser("sweep", help="throughput and memory of a streamed /sweep")
+    p.add_argument("--points", type=int, default=1_000_000)
+    p.add_argument("--summary-only", action="store_true", help="only stream the top-k summary")
+    p.set_defaults(func=bench_sweep)
+
+    p = sub.add_parser("dataset", help="dataset load time: Excel vs columnar cache")
+    p.set_defaults(func=bench_dataset)
+
+    p = sub.add_parser("load", help="p50/p99 latency and req/s: Flask vs ASGI micro-batching")
+    p.add_argument("--concurrency", type=int, default=32)
+    p.add_argument("--requests", type=int, default=3000)
+    p.add_argument("--port", type=int, default=18080)
+    p.set_defaults(func=bench_load)
+
+    p = sub.add_parser("surrogate", help="fast surrogate latency vs accuracy against the full model")
+    p.add_argument("--sizes", nargs="+", default=["4x6", "8x6", "16x8", "32x10", "64x12"],
+                   help="surrogate sizes as TREESxDEPTH")
+    p.set_defaults(func=bench_surrogate)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
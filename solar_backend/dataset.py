@@ -0,0 +1,169 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from artifact import BASE_DIR, DATASET_PATH
+
+CACHE_DIR = os.environ.get("DATASET_CACHE_DIR", os.path.join(BASE_DIR, ".dataset_cache"))
+META_FILE = "meta.json"
+
+# Bumped whenever the cache layout changes, forcing a rebuild
+CACHE_FORMAT = 1
+
+
+# ================================
+# Columnar Cache
+# ================================
+class ColumnarDataset:
+    """Read-only view of the workbook converted to one .npy file per column.
+
+    Numeric columns are memory-mapped, so only the columns a caller asks for
+    are paged in. Text columns are stored as int32 codes plus their
+    categories. Per-column min/max/mean/std are computed once at conversion
+    time and kept in meta.json.
+    """
+
+    def __init__(self, cache_dir, meta):
+        self.cache_dir = cache_dir
+        self.meta = meta
+
+    @property
+    def sha256(self):
+        return self.meta["sha256"]
+
+    @property
+    def n_rows(self):
+        return self.meta["n_rows"]
+
+    @property
+    def columns(self):
+        return list(self.meta["columns"])
+
+    def column(self, name):
+        info = self._info(name)
+        data = np.load(os.path.join(self.cache_dir, info["file"]), mmap_mode="r")
+        if info["kind"] == "category":
+            categories = np.asarray(info["categories"] + [None], dtype=object)
+            return categories[data]  # code -1 (missing) picks the trailing None
+        return data
+
+    def frame(self, columns=None):
+        return pd.DataFrame({name: self.column(name) for name in (columns or self.columns)})
+
+    def stats(self, name):
+        return self._info(name)["stats"]
+
+    def ranges(self, columns):
+        """(min, max) per column from the stored statistics, no data scan."""
+        return {name: (self.stats(name)["min"], self.stats(name)["max"]) for name in columns}
+
+    def _info(self, name):
+        try:
+            return self.meta["columns"][name]
+        except KeyError:
+            raise KeyError(f"Column {name!r} not in dataset. Available: {self.columns}") from None
+
+
+def open_dataset(path=DATASET_PATH, cache_dir=CACHE_DIR):
+    """Return the cached columnar copy of the workbook, (re)building it if stale.
+
+    The cache is trusted when the workbook's mtime and size match. When they
+    differ the file is hashed, and only a different sha256 triggers the slow
+    Excel parse again.
+    """
+    st = os.stat(path)
+    meta = _read_meta(cache_dir)
+    if meta is not None and meta["format"] == CACHE_FORMAT:
+        if (meta["mtime_ns"], meta["size"]) == (st.st_mtime_ns, st.st_size):
+            return ColumnarDataset(cache_dir, meta)
+        if meta["sha256"] == _file_sha256(path):
+            meta.update(mtime_ns=st.st_mtime_ns, size=st.st_size)
+            _write_meta(cache_dir, meta)
+            return ColumnarDataset(cache_dir, meta)
+
+    return ColumnarDataset(cache_dir, build_cache(path, cache_dir))
+
+
+def build_cache(path=DATASET_PATH, cache_dir=CACHE_DIR):
+    """Parse the workbook once and write the columnar cache."""
+    os.makedirs(cache_dir, exist_ok=True)
+    st = os.stat(path)
+    sha = _file_sha256(path)
+    df = pd.read_excel(path)
+
+    # New files are prefixed with the hash, so readers of the old meta.json
+    # keep working until the new one is swapped in
+    prefix = sha[:16]
+    columns = {}
+    for i, name in enumerate(df.columns):
+        col = df[name]
+        file = f"{prefix}-c{i:03d}.npy"
+        if pd.api.types.is_numeric_dtype(col):
+            data = col.to_numpy(dtype=float)
+            info = {"kind": "numeric", "stats": _numeric_stats(data)}
+        else:
+            codes, categories = pd.factorize(col.astype("string"), use_na_sentinel=True)
+            data = codes.astype(np.int32)
+            info = {"kind": "category", "categories": [str(c) for c in categories],
+                    "stats": {"null_count": int((codes == -1).sum())}}
+        np.save(os.path.join(cache_dir, file), data)
+        columns[str(name)] = {"file": file, **info}
+
+    meta = {
+        "format": CACHE_FORMAT,
+        "source": os.path.abspath(path),
+        "mtime_ns": st.st_mtime_ns,
+        "size": st.st_size,
+        "sha256": sha,
+        "n_rows": int(len(df)),
+        "columns": columns,
+    }
+    _write_meta(cache_dir, meta)
+
+    # Drop column files from previous workbook versions
+    for file in os.listdir(cache_dir):
+        if file.endswith(".npy") and not file.startswith(prefix):
+            os.remove(os.path.join(cache_dir, file))
+    return meta
+
+
+# ================================
+# Helpers
+# ================================
+def _numeric_stats(data):
+    valid = data[~np.isnan(data)]
+    if valid.size == 0:
+        return {"min": None, "max": None, "mean": None, "std": None, "null_count": int(data.size)}
+    return {
+        "min": float(valid.min()),
+        "max": float(valid.max()),
+        "mean": float(valid.mean()),
+        "std": float(valid.std()),
+        "null_count": int(data.size - valid.size),
+    }
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _read_meta(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, META_FILE)) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _write_meta(cache_dir, meta):
+    tmp_path = os.path.join(cache_dir, META_FILE + f".{os.getpid()}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(meta, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, os.path.join(cache_dir, META_FILE))
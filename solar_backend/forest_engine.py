@@ -0,0 +1,189 @@
+import numpy as np
+
+# Complete-tree layout grows as 2**depth per tree: at depth 12 a 200-tree,
+# 3-output forest is ~30 MB of arrays (depth 16 would be ~470 MB per artifact)
+MAX_EXPORT_DEPTH = 12
+
+# Rows walked together; keeps the (rows x trees) index arrays cache-resident
+CHUNK_ROWS = 256
+
+# RoutedForest hands matrices larger than this to sklearn (crossover ~3k rows)
+FLAT_MAX_ROWS = 2048
+
+
+# ================================
+# Scaler Folding
+# ================================
+def fold_scaler(threshold, feature, scaler):
+    """Move split thresholds from scaled space back into raw feature space.
+
+    sklearn decides float32((x - mean) / scale) <= t, so the naive
+    t * scale + mean can land on the wrong side of rows that sit exactly on
+    a split. Instead bisect for the largest raw x that sklearn still sends
+    left, which makes `x <= folded` agree with sklearn for every input.
+    """
+    mean = scaler.mean_[feature]
+    scale = scaler.scale_[feature]
+
+    def goes_left(x):
+        return ((x - mean) / scale).astype(np.float32) <= threshold
+
+    guess = threshold * scale + mean
+    width = scale * (np.abs(threshold) * 1e-6 + 1e-30)
+    lo, hi = guess - width, guess + width
+    while not (goes_left(lo).all() and not goes_left(hi).any()):
+        width *= 2
+        lo = np.where(goes_left(lo), lo, guess - width)
+        hi = np.where(goes_left(hi), guess + width, hi)
+
+    for _ in range(128):
+        mid = lo + (hi - lo) / 2
+        left = goes_left(mid)
+        lo = np.where(left, mid, lo)
+        hi = np.where(left, hi, mid)
+    return lo
+
+
+# ================================
+# Flat Forest Export
+# ================================
+def export_forest(model, scaler=None):
+    """Flatten a fitted RandomForestRegressor into contiguous arrays.
+
+    Every tree is padded out to a complete binary tree of the forest's max
+    depth, stored level by level, so the children of slot i are 2i+1 and
+    2i+2 and no child pointers have to be looked up while walking. A leaf
+    that sits above the last level becomes a dummy split with threshold
+    +inf whose left subtree repeats it down to the bottom.
+
+    When a StandardScaler is given its mean/scale are folded into the
+    thresholds (see fold_scaler), so raw feature rows can be fed in directly.
+    """
+    trees = [est.tree_ for est in model.estimators_]
+    depth = max(t.max_depth for t in trees)
+    if depth > MAX_EXPORT_DEPTH:
+        raise ValueError(f"Forest depth {depth} exceeds MAX_EXPORT_DEPTH={MAX_EXPORT_DEPTH}.")
+
+    n_internal = 2 ** depth - 1
+    n_leaves = 2 ** depth
+    n_outputs = trees[0].value.shape[1]
+
+    feature = np.zeros((len(trees), n_internal), dtype=np.int32)
+    threshold = np.full((len(trees), n_internal), np.inf)
+    leaf_value = np.zeros((len(trees), n_leaves, n_outputs))
+
+    for t, tree in enumerate(trees):
+        left, right = tree.children_left, tree.children_right
+        # slot → original node, one level at a time
+        level = np.zeros(1, dtype=np.intp)
+        for d in range(depth):
+            start = 2 ** d - 1
+            is_split = left[level] != -1
+            slots = start + np.arange(len(level))
+            feature[t, slots[is_split]] = tree.feature[level[is_split]]
+            threshold[t, slots[is_split]] = tree.threshold[level[is_split]]
+            level = np.stack([
+                np.where(is_split, left[level], level),
+                np.where(is_split, right[level], level),
+            ], axis=1).ravel()
+        leaf_value[t] = tree.value[level, :, 0]
+
+    if scaler is not None:
+        split = np.isfinite(threshold)
+        threshold[split] = fold_scaler(threshold[split], feature[split], scaler)
+
+    return {
+        "feature": feature.ravel(),
+        "threshold": threshold.ravel(),
+        # one contiguous array per output, tree-major
+        "leaf_value": np.ascontiguousarray(leaf_value.transpose(2, 0, 1).reshape(n_outputs, -1)),
+        "n_trees": len(trees),
+        "depth": depth,
+    }
+
+
+# ================================
+# Lock-step Evaluator
+# ================================
+class FlatForest:
+    """Evaluates an exported forest for a whole batch with plain NumPy indexing."""
+
+    def __init__(self, arrays):
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.leaf_value = arrays["leaf_value"]
+        self.n_trees = arrays["n_trees"]
+        self.depth = arrays["depth"]
+        n_internal = 2 ** self.depth - 1
+        trees = np.arange(self.n_trees, dtype=np.int32)
+        self.tree_offset = trees * n_internal
+        # With node = tree_offset + slot: left child = 2 * node + child_base,
+        # and after the last level the leaf index is node + leaf_base
+        self.child_base = 1 - self.tree_offset
+        self.leaf_base = trees - n_internal
+
+    def predict(self, X):
+        """Mean leaf value over all trees for each row of raw (unscaled) X."""
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        out = np.empty((len(X), len(self.leaf_value)))
+        for start in range(0, len(X), CHUNK_ROWS):
+            self._predict_chunk(X[start:start + CHUNK_ROWS], out[start:start + CHUNK_ROWS])
+        out /= self.n_trees
+        return out
+
+    def _predict_chunk(self, X, out):
+        n_rows, n_features = X.shape
+        flat_x = X.ravel()
+        row_offset = (np.arange(n_rows, dtype=np.int32) * n_features)[:, None]
+
+        # All rows walk all trees together, one level per step, in preallocated buffers
+        shape = (n_rows, self.n_trees)
+        node = np.empty(shape, dtype=np.int32)
+        node[:] = self.tree_offset
+        index = np.empty(shape, dtype=np.int32)
+        x = np.empty(shape)
+        threshold = np.empty(shape)
+        right = np.empty(shape, dtype=bool)
+        for _ in range(self.depth):
+            self.feature.take(node, out=index)
+            index += row_offset
+            flat_x.take(index, out=x)
+            self.threshold.take(node, out=threshold)
+            np.greater(x, threshold, out=right)
+            node += node
+            node += self.child_base
+            node += right
+
+        node += self.leaf_base
+        for k, values in enumerate(self.leaf_value):
+            out[:, k] = values.take(node).sum(axis=1)
+
+
+class SklearnForest:
+    """Same interface as FlatForest on top of the original scaler + model."""
+
+    def __init__(self, model, scaler):
+        self.model = model
+        self.scaler = scaler
+
+    def predict(self, X):
+        return self.model.predict(self.scaler.transform(X)).reshape(len(X), -1)
+
+
+class RoutedForest:
+    """FlatForest for small matrices, sklearn for large ones.
+
+    The flat engine wins by orders of magnitude on the 1-1000 row requests it
+    was built for, but its padded lock-step walk falls behind sklearn's
+    per-tree Cython traversal somewhere past a few thousand rows (see
+    `benchmark.py engine`), so bigger batches and sweep chunks go to sklearn.
+    """
+
+    def __init__(self, flat, sklearn, max_flat_rows=FLAT_MAX_ROWS):
+        self.flat = flat
+        self.sklearn = sklearn
+        self.max_flat_rows = max_flat_rows
+
+    def predict(self, X):
+        engine = self.flat if len(X) <= self.max_flat_rows else self.sklearn
+        return engine.predict(X)
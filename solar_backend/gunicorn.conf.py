@@ -0,0 +1,10 @@
+import os
+
+# Import app.py (and load the model artifact) once in the master process so
+# workers start without loading their own. The memory-mapped flat forest is
+# shared for good; the sklearn model is shared copy-on-write only until the
+# first hot-swap, after which each worker loads a private copy.
+preload_app = True
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 10000)}"
+workers = int(os.environ.get("WEB_CONCURRENCY", 2))
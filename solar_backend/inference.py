@@ -0,0 +1,139 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:  # Arrow bodies are optional
+    pa = None
+
+# Efficiency is clamped to a realistic range, same as /predict
+EFFICIENCY_MAX = 80
+
+
+# ================================
+# Request Body → DataFrame
+# ================================
+def frame_from_json(records):
+    if not isinstance(records, list) or not all(isinstance(r, dict) for r in records):
+        raise ValueError("Expected a JSON array of objects.")
+    return pd.DataFrame.from_records(records)
+
+
+def frame_from_csv(body):
+    return pd.read_csv(io.BytesIO(body))
+
+
+def frame_from_arrow(body):
+    if pa is None:
+        raise ValueError("Arrow bodies need pyarrow installed on the server.")
+    with pa.ipc.open_stream(body) as reader:
+        return reader.read_all().to_pandas()
+
+
+# ================================
+# Single-row Validation
+# ================================
+def validate_record(data, shape_map, feature_order, lo, hi):
+    """Validate one /predict body → (row, None) or (None, error message).
+
+    row is the shape code followed by the feature_order values.
+    """
+    # Only strings can name a shape (and lists/dicts can't be dict keys)
+    shape = data.get("shape")
+    shape = shape_map.get(shape) if isinstance(shape, str) else None
+    if shape is None:
+        return None, f"Invalid shape. Choose from {list(shape_map.keys())}"
+
+    row = [shape]
+    for j, key in enumerate(feature_order):
+        val = data.get(key)
+        # NaN (a bare NaN in the JSON body) counts as missing, as in frame_to_matrix
+        if val is None or (isinstance(val, float) and val != val):
+            return None, f"Missing value for {key}"
+        try:
+            val = float(val)
+        except (TypeError, ValueError):
+            return None, f"Invalid value for {key}"
+        # Validate against dataset min-max
+        if not (lo[j] <= val <= hi[j]):
+            return None, f"{key} should be between {round(lo[j], 2)} and {round(hi[j], 2)}"
+        row.append(val)
+    return row, None
+
+
+# ================================
+# Vectorized Validation
+# ================================
+def range_arrays(validation_ranges, key_map, feature_order):
+    """Per-feature (lo, hi) arrays in feature_order; unknown ranges are unbounded."""
+    lo = np.array([validation_ranges.get(key_map[k], (-np.inf, np.inf))[0] for k in feature_order], dtype=float)
+    hi = np.array([validation_ranges.get(key_map[k], (-np.inf, np.inf))[1] for k in feature_order], dtype=float)
+    return lo, hi
+
+
+def frame_to_matrix(df, shape_map, feature_order, lo, hi):
+    """Build the model input matrix for every row and validate them all at once.
+
+    Returns (X, errors) where X has one row per input row (shape first, then
+    feature_order) and errors[i] is None for valid rows or the same message
+    /predict would have returned for that row.
+    """
+    n = len(df)
+    X = np.empty((n, 1 + len(feature_order)), dtype=float)
+
+    shapes = df["shape"] if "shape" in df else pd.Series([None] * n)
+    # Non-string shapes (lists, dicts, numbers) become NaN → per-row "Invalid shape"
+    shapes = shapes.where(shapes.map(type) == str)
+    X[:, 0] = shapes.map(shape_map).to_numpy(dtype=float, na_value=np.nan)
+
+    missing = np.zeros((n, len(feature_order)), dtype=bool)
+    for j, key in enumerate(feature_order):
+        if key not in df:
+            missing[:, j] = True
+            X[:, j + 1] = np.nan
+            continue
+        col = df[key]
+        missing[:, j] = col.isna().to_numpy()
+        X[:, j + 1] = pd.to_numeric(col, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+
+    bad_shape = np.isnan(X[:, 0])
+    values = X[:, 1:]
+    not_numeric = np.isnan(values) & ~missing
+    with np.errstate(invalid="ignore"):
+        out_of_range = (values < lo) | (values > hi)
+    bad_value = missing | not_numeric | out_of_range
+
+    errors = [None] * n
+    for i in np.flatnonzero(bad_shape | bad_value.any(axis=1)):
+        if bad_shape[i]:
+            errors[i] = f"Invalid shape. Choose from {list(shape_map.keys())}"
+            continue
+        j = int(np.argmax(bad_value[i]))
+        key = feature_order[j]
+        if missing[i, j]:
+            errors[i] = f"Missing value for {key}"
+        elif not_numeric[i, j]:
+            errors[i] = f"Invalid value for {key}"
+        else:
+            errors[i] = f"{key} should be between {round(lo[j], 2)} and {round(hi[j], 2)}"
+    return X, errors
+
+
+# ================================
+# Inference
+# ================================
+def predict_matrix(engine, X):
+    """One forest pass over all raw rows → (n, 3) array of Qout, Qloss, Efficiency."""
+    return engine.predict(X)
+
+
+def format_predictions(pred):
+    """Round like /predict does and turn rows into predicted_values dicts."""
+    pred = np.round(pred, 2)
+    pred[:, 2] = np.clip(pred[:, 2], 0, EFFICIENCY_MAX)
+    return [
+        {"Qout": qout, "Qloss": qloss, "Efficiency(%)": eff}
+        for qout, qloss, eff in pred.tolist()
+    ]
@@ -0,0 +1,103 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+# ================================
+# Micro-batching
+# ================================
+class MicroBatcher:
+    """Collects rows from concurrent requests and runs the forest once per batch.
+
+    The first queued row opens a window of window_ms; everything that arrives
+    before it closes (up to max_rows) is stacked into one matrix and
+    predicted in a worker thread, so the event loop never blocks on the model.
+    Up to `workers` batches run at once; while they are busy, new rows keep
+    queueing and form the next, larger batch.
+    """
+
+    def __init__(self, predict, window_ms=2.0, max_rows=256, workers=1):
+        self.predict = predict  # callable: (n, n_features) array → (n, n_outputs) array
+        self.window = window_ms / 1000
+        self.max_rows = max_rows
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="microbatch")
+        self.queue = None
+        self.slots = None
+        self.task = None
+        self.running = set()
+        self.batches = 0
+        self.rows = 0
+
+    async def start(self):
+        self.queue = asyncio.Queue()
+        self.slots = asyncio.Semaphore(self.workers)
+        self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        self.executor.shutdown(wait=False)
+
+    async def submit(self, row):
+        """Queue one input row and wait for its prediction."""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((row, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            # Take a slot first, so rows keep piling up while every worker is busy
+            await self.slots.acquire()
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_rows:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            task = asyncio.create_task(self._dispatch(batch))
+            self.running.add(task)
+            task.add_done_callback(self.running.discard)
+
+    async def _dispatch(self, batch):
+        try:
+            # Requests cancelled while waiting (client went away) are skipped
+            batch = [(row, future) for row, future in batch if not future.done()]
+            if not batch:
+                return
+            X = np.array([row for row, _ in batch], dtype=float)
+            try:
+                pred = await asyncio.get_running_loop().run_in_executor(self.executor, self.predict, X)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+
+            self.batches += 1
+            self.rows += len(batch)
+            for (_, future), values in zip(batch, pred):
+                if not future.done():
+                    future.set_result(values)
+        finally:
+            self.slots.release()
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "rows": self.rows,
+            "mean_batch_size": self.rows / self.batches if self.batches else 0.0,
+            "window_ms": self.window * 1000,
+            "max_rows": self.max_rows,
+        }
@@ -0,0 +1,202 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+log = logging.getLogger("solar_backend.cache")
+
+
+# ================================
+# Shared Backend (optional)
+# ================================
+class SqliteBackend:
+    """Cross-process cache store in a local SQLite file.
+
+    Any object with the same get/set/purge methods can be passed to
+    PredictionCache as its shared backend. Every prune_every writes, expired
+    rows are deleted and the table is trimmed to max_rows (soonest-expiring
+    first), so the file stays bounded under a long-lived model version.
+    """
+
+    def __init__(self, path, max_rows=100_000, prune_every=256):
+        self.path = path
+        self.max_rows = max_rows
+        self.prune_every = prune_every
+        self.writes = 0
+        self.local = threading.local()
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS predictions ("
+                "key TEXT PRIMARY KEY, version TEXT, value TEXT, expires REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS predictions_expires ON predictions (expires)")
+
+    def _conn(self):
+        # One connection per thread and process (never reuse one across a fork);
+        # WAL lets every gunicorn worker read while one writes
+        conn = getattr(self.local, "conn", None)
+        if conn is None or self.local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=1.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+            self.local.pid = os.getpid()
+        return conn
+
+    def get(self, key, version):
+        row = self._conn().execute(
+            "SELECT value FROM predictions WHERE key = ? AND version = ? AND expires > ?",
+            (key, version, time.time()),
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key, version, value, ttl):
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?)",
+                (key, version, json.dumps(value), time.time() + ttl),
+            )
+        self.writes += 1
+        if self.writes % self.prune_every == 0:
+            self.prune()
+
+    def prune(self):
+        """Drop expired entries, then the soonest-expiring ones beyond max_rows."""
+        with self._conn() as conn:
+            conn.execute("DELETE FROM predictions WHERE expires <= ?", (time.time(),))
+            excess = conn.execute("SELECT COUNT(*) FROM predictions").fetchone()[0] - self.max_rows
+            if excess > 0:
+                conn.execute(
+                    "DELETE FROM predictions WHERE key IN "
+                    "(SELECT key FROM predictions ORDER BY expires LIMIT ?)",
+                    (excess,),
+                )
+
+    def purge(self, version):
+        """Drop entries from other model versions and anything expired."""
+        with self._conn() as conn:
+            conn.execute(
+                "DELETE FROM predictions WHERE version != ? OR expires <= ?",
+                (version, time.time()),
+            )
+
+
+# ================================
+# In-process LRU
+# ================================
+class PredictionCache:
+    """LRU + TTL cache of predictions keyed on the quantized input vector.
+
+    Failures of the shared backend (e.g. a locked SQLite file) are logged and
+    treated as a miss or a skipped write; they never fail the request.
+    """
+
+    def __init__(self, maxsize=4096, ttl=300.0, precision=3, version=None, shared=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.precision = precision
+        self.version = version
+        self.shared = shared
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.shared_errors = 0
+        if shared is not None and version is not None:
+            self._shared("purge", version)
+
+    @property
+    def enabled(self):
+        return self.maxsize > 0
+
+    def quantize(self, shape, values):
+        """Round the inputs to the cache precision; the result is also what gets predicted."""
+        return [shape] + [round(float(v), self.precision) for v in values]
+
+    def get(self, row):
+        key = self._key(row)
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires > now:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self.entries[key]
+
+        if self.shared is not None:
+            value = self._shared("get", key, self.version)
+            if value is not None:
+                with self.lock:
+                    self.shared_hits += 1
+                    self._store(key, value, now)
+                return value
+
+        with self.lock:
+            self.misses += 1
+        return None
+
+    def put(self, row, value, version=None):
+        """Store value; skipped when it came from a model version other than the current one."""
+        key = self._key(row)
+        with self.lock:
+            if version is None:
+                version = self.version
+            elif version != self.version:
+                return
+            self._store(key, value, time.monotonic())
+        if self.shared is not None:
+            self._shared("set", key, version, value, self.ttl)
+
+    def set_version(self, version):
+        """Call when a new model artifact is loaded; drops everything cached for the old one."""
+        if version == self.version:
+            return
+        with self.lock:
+            self.version = version
+            self.entries.clear()
+        if self.shared is not None:
+            self._shared("purge", version)
+
+    def stats(self):
+        with self.lock:
+            return {
+                "enabled": self.enabled,
+                "version": self.version,
+                "size": len(self.entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "precision": self.precision,
+                "shared": self.shared is not None,
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "shared_errors": self.shared_errors,
+            }
+
+    def _shared(self, method, *args):
+        try:
+            return getattr(self.shared, method)(*args)
+        except Exception as e:
+            with self.lock:
+                self.shared_errors += 1
+            log.warning("shared prediction cache %s failed: %s", method, e)
+            return None
+
+    def _key(self, row):
+        return "|".join(repr(v) for v in row)
+
+    def _store(self, key, value, now):
+        self.entries[key] = (now + self.ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
@@ -0,0 +1,78 @@
+import collections
+import os
+import sys
+import threading
+import time
+
+
+# ================================
+# Slow-request Sampling Profiler
+# ================================
+class SlowRequestProfiler:
+    """Samples the stacks of in-flight requests and dumps the slow ones.
+
+    One background thread wakes every interval_ms and records the current
+    stack of each thread that is inside a request. When a request finishes
+    after more than threshold_ms its samples are written to out_dir as
+    collapsed stacks ("frame;frame;frame count" per line), the input format
+    of flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, threshold_ms, interval_ms=1.0, out_dir="profiles"):
+        self.threshold = threshold_ms / 1000
+        self.interval = interval_ms / 1000
+        self.out_dir = out_dir
+        self.lock = threading.Lock()
+        self.active = {}  # thread id → Counter of collapsed stacks
+        self.sampler = None
+        self.sampler_pid = None
+
+    def start_request(self):
+        self._ensure_sampler()
+        with self.lock:
+            self.active[threading.get_ident()] = collections.Counter()
+        return time.perf_counter()
+
+    def end_request(self, started, name):
+        with self.lock:
+            samples = self.active.pop(threading.get_ident(), None)
+        elapsed = time.perf_counter() - started
+        if samples and elapsed >= self.threshold:
+            return self._dump(samples, name, elapsed)
+        return None
+
+    def _ensure_sampler(self):
+        # The sampler thread does not survive a fork, so restart it per worker
+        if self.sampler_pid != os.getpid():
+            self.sampler_pid = os.getpid()
+            self.sampler = threading.Thread(target=self._sample, name="slow-request-profiler", daemon=True)
+            self.sampler.start()
+
+    def _sample(self):
+        own = threading.get_ident()
+        while True:
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self.lock:
+                for ident, samples in self.active.items():
+                    frame = frames.get(ident)
+                    if frame is not None and ident != own:
+                        samples[_collapse(frame)] += 1
+
+    def _dump(self, samples, name, elapsed):
+        os.makedirs(self.out_dir, exist_ok=True)
+        slug = name.strip("/").replace("/", "_") or "root"
+        path = os.path.join(self.out_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{slug}-{elapsed * 1000:.0f}ms.folded")
+        with open(path, "w") as f:
+            for stack, count in samples.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
+
+
+def _collapse(frame):
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(stack))
@@ -0,0 +1,60 @@
+import time
+
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+
+from forest_engine import FlatForest, export_forest
+
+# Small forest distilled from the full one; see `benchmark.py surrogate` for other sizes
+SURROGATE_PARAMS = {"n_estimators": 16, "max_depth": 8, "min_samples_leaf": 2}
+
+
+# ================================
+# Distillation
+# ================================
+def sample_box(shape_codes, lo, hi, n, rng):
+    """n raw input rows: a random shape, every feature uniform in [lo, hi]."""
+    shapes = rng.choice(np.asarray(shape_codes, dtype=float), size=n)
+    return np.column_stack([shapes, lo + rng.random((n, len(lo))) * (hi - lo)])
+
+
+def build_surrogate(full_engine, shape_codes, lo, hi, params=None,
+                    n_train=20000, n_holdout=5000, seed=0):
+    """Fit a small forest on the full model's own predictions over the validation box.
+
+    The full model labels n_train uniformly sampled points, the surrogate is
+    fitted on them (raw features, no scaler), and n_holdout fresh points
+    measure how far it strays from the full model. Those errors are returned
+    with every fast-mode prediction.
+    """
+    params = params or SURROGATE_PARAMS
+    rng = np.random.default_rng(seed)
+    started = time.perf_counter()
+
+    X_train = sample_box(shape_codes, lo, hi, n_train, rng)
+    model = RandomForestRegressor(random_state=seed, n_jobs=-1, **params)
+    model.fit(X_train, full_engine.predict(X_train))
+    flat_forest = export_forest(model)
+
+    X_holdout = sample_box(shape_codes, lo, hi, n_holdout, rng)
+    error = np.abs(FlatForest(flat_forest).predict(X_holdout) - full_engine.predict(X_holdout))
+
+    return {
+        "flat_forest": flat_forest,
+        "params": dict(params),
+        "n_train": n_train,
+        "error_bound": error_bound(error),
+        "fit_seconds": time.perf_counter() - started,
+    }
+
+
+def error_bound(error, targets=("Qout", "Qloss", "Efficiency(%)")):
+    """Per-target |surrogate - full| summary over the holdout points."""
+    return {
+        stat: dict(zip(targets, np.round(values, 4).tolist()))
+        for stat, values in (
+            ("mean_abs", error.mean(axis=0)),
+            ("p95_abs", np.percentile(error, 95, axis=0)),
+            ("max_abs", error.max(axis=0)),
+        )
+    }
@@ -0,0 +1,173 @@
+import heapq
+import json
+import math
+
+import numpy as np
+
+from inference import format_predictions
+
+# Column of the prediction matrix each objective ranks on
+OBJECTIVES = {"Qout": 0, "Efficiency": 2}
+
+
+# ================================
+# Grid Spec → Axes
+# ================================
+def _number(key, value, name):
+    """A finite JSON number (bools are not numbers here)."""
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise ValueError(f"{key}: {name} must be a finite number")
+    return float(value)
+
+
+def _count(key, value):
+    """A whole number of points; 5.0 is fine, 2.7, true and inf are not."""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"{key}: num must be an integer")
+    if isinstance(value, float) and not (math.isfinite(value) and value.is_integer()):
+        raise ValueError(f"{key}: num must be an integer")
+    return int(value)
+
+
+def axis_values(key, spec, lo, hi, max_points):
+    """Turn one parameter spec into a sorted array of values clipped to [lo, hi].
+
+    A spec is a number, a list of values, {"values": [...]}, or a range
+    {"start", "stop", "num"} / {"start", "stop", "step"}. start/stop default to
+    the validation bounds, so {"num": 20} sweeps the whole valid range.
+    Ranges longer than max_points are rejected before anything is allocated.
+    """
+    if isinstance(spec, bool):
+        raise ValueError(f"Invalid value for {key}")
+    if isinstance(spec, (int, float)):
+        values = [spec]
+    elif isinstance(spec, list):
+        values = spec
+    elif isinstance(spec, dict) and "values" in spec:
+        values = spec["values"]
+    elif isinstance(spec, dict):
+        start = _number(key, spec.get("start", float(lo)), "start")
+        stop = _number(key, spec.get("stop", float(hi)), "stop")
+        if "step" in spec:
+            step = _number(key, spec["step"], "step")
+            if step <= 0:
+                raise ValueError(f"{key}: step must be positive")
+            steps = (stop - start) / step
+            if not math.isfinite(steps) or steps >= max_points:
+                raise ValueError(f"{key}: range must have between 1 and {max_points} points")
+            num = int(math.floor(steps + 1e-9)) + 1
+            stop = start + (num - 1) * step
+        else:
+            num = _count(key, spec.get("num", 10))
+        if not 0 < num <= max_points:
+            raise ValueError(f"{key}: range must have between 1 and {max_points} points")
+        values = np.linspace(start, stop, num)
+    else:
+        raise ValueError(f"Invalid value for {key}")
+
+    if isinstance(values, list) and any(isinstance(v, bool) for v in values):
+        raise ValueError(f"Invalid value for {key}")
+    try:
+        values = np.asarray(values, dtype=float)
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError(f"Invalid value for {key}")
+    if values.ndim != 1 or values.size == 0 or not np.isfinite(values).all():
+        raise ValueError(f"Invalid value for {key}")
+    values = np.unique(np.clip(values, lo, hi))
+    if values.size > max_points:
+        raise ValueError(f"{key}: list must have at most {max_points} values")
+    return values
+
+
+def build_axes(spec, shape_map, feature_order, lo, hi, max_points):
+    """Parse a /sweep body into one value array per model input (shape first)."""
+    if not isinstance(spec, dict):
+        raise ValueError("No input data provided.")
+
+    shapes = spec.get("shape", list(shape_map))
+    shapes = [shapes] if isinstance(shapes, str) else shapes
+    if not isinstance(shapes, list) or not shapes or any(s not in shape_map for s in shapes):
+        raise ValueError(f"Invalid shape. Choose from {list(shape_map.keys())}")
+    axes = [np.array(sorted({shape_map[s] for s in shapes}), dtype=float)]
+
+    params = spec.get("params", {})
+    if not isinstance(params, dict):
+        raise ValueError("params must be an object of feature → value or range")
+    # Running product: each axis only gets what is left of the point budget,
+    # so an oversized grid is rejected before its axes are built
+    total = len(axes[0])
+    for j, key in enumerate(feature_order):
+        if params.get(key) is None:
+            raise ValueError(f"Missing value for {key}")
+        budget = max_points // total
+        if budget < 1:
+            raise ValueError(f"Sweep has more than {max_points} points")
+        axes.append(axis_values(key, params[key], lo[j], hi[j], budget))
+        total *= len(axes[-1])
+    return axes
+
+
+# ================================
+# Lazy Grid + Streaming Inference
+# ================================
+def iter_grid(axes, chunk_size):
+    """Yield (start, X) chunks of the Cartesian product without materializing it."""
+    dims = [len(a) for a in axes]
+    total = math.prod(dims)
+    for start in range(0, total, chunk_size):
+        idx = np.unravel_index(np.arange(start, min(start + chunk_size, total)), dims)
+        yield start, np.column_stack([a[i] for a, i in zip(axes, idx)])
+
+
+def sweep_lines(engine, axes, shape_map, feature_order, chunk_size=10000,
+                top_k=0, objective="Efficiency", stream_rows=True, summary_extra=None):
+    """Run the sweep chunk by chunk and yield NDJSON lines.
+
+    One line per grid point (unless stream_rows is False), then a final
+    {"summary": ...} line with the point count and the top_k points by
+    objective (plus summary_extra). Ranking uses the raw model output, before
+    the Efficiency clamp.
+    """
+    shape_names = {float(code): name for name, code in shape_map.items()}
+    column = OBJECTIVES[objective]
+    heap = []  # min-heap of (score, -index, row) holding the best top_k so far
+    total = 0
+
+    def row_dict(x, values):
+        return {
+            "inputs": {"shape": shape_names[x[0]], **dict(zip(feature_order, x[1:]))},
+            "predicted_values": values,
+        }
+
+    for start, X in iter_grid(axes, chunk_size):
+        pred = engine.predict(X)
+        total += len(X)
+        formatted = format_predictions(pred) if stream_rows else None
+
+        if stream_rows:
+            yield "".join(
+                json.dumps(row_dict(x, values)) + "\n"
+                for x, values in zip(X.tolist(), formatted)
+            )
+
+        if top_k:
+            scores = pred[:, column]
+            candidates = np.arange(len(X))
+            if len(X) > top_k:
+                candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+            for i in candidates.tolist():
+                key = (float(scores[i]), -(start + i))
+                if len(heap) == top_k and key <= heap[0][:2]:
+                    continue
+                # Build the output row only for points that actually enter the heap
+                values = formatted[i] if stream_rows else format_predictions(pred[i:i + 1])[0]
+                entry = (*key, row_dict(X[i].tolist(), values))
+                if len(heap) < top_k:
+                    heapq.heappush(heap, entry)
+                else:
+                    heapq.heapreplace(heap, entry)
+
+    best = [row for _, _, row in sorted(heap, reverse=True)]
+    summary = {"points": total, "objective": objective, "top_k": best, **(summary_extra or {})}
+    yield json.dumps({"summary": summary}) + "\n"
+
@@ -0,0 +1,86 @@
+"""Parity of the flat forest engine with sklearn (run: python -m pytest -q)."""
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.preprocessing import StandardScaler
+
+from artifact import FEATURE_COLS, TARGET_COLS
+from forest_engine import FlatForest, RoutedForest, SklearnForest, export_forest, fold_scaler
+
+TOLERANCE = 1e-9
+
+
+@pytest.fixture(scope="module")
+def forests():
+    """A scaled 3-output forest shaped like train_model.py's, on synthetic rows."""
+    rng = np.random.default_rng(0)
+    n = 400
+    # Shape code, then features on very different scales (W/m2 down to m)
+    lo = rng.choice([0.01, 0.5, 20.0, 300.0], size=len(FEATURE_COLS) - 1)
+    X = np.column_stack([rng.integers(0, 5, n), lo + rng.random((n, len(lo))) * lo * 3]).astype(float)
+    y = np.column_stack([
+        X[:, 1:4].sum(axis=1) * X[:, 0],
+        X[:, 4:7].prod(axis=1),
+        60 + X[:, 7] - X[:, 8] * X[:, 0],
+    ]) + rng.normal(0, 1, (n, len(TARGET_COLS)))
+
+    scaler = StandardScaler().fit(X)
+    model = RandomForestRegressor(n_estimators=25, max_depth=8, random_state=0).fit(scaler.transform(X), y)
+    return FlatForest(export_forest(model, scaler)), SklearnForest(model, scaler), model, scaler, X
+
+
+def boundary_rows(model, scaler, X):
+    """Rows with one feature exactly on a raw split threshold, or one ulp either side.
+
+    The raw thresholds are taken both from the naive unscaling and from the
+    largest raw value sklearn still sends left, i.e. the cases where folding
+    the scaler into the thresholds can go wrong.
+    """
+    rng = np.random.default_rng(1)
+    rows = []
+    for est in model.estimators_[:5]:
+        tree = est.tree_
+        for node in np.flatnonzero(tree.children_left != -1):
+            f = tree.feature[node]
+            naive = tree.threshold[node] * scaler.scale_[f] + scaler.mean_[f]
+            folded = fold_scaler(tree.threshold[node:node + 1], tree.feature[node:node + 1], scaler)[0]
+            for value in (naive, folded, np.nextafter(folded, -np.inf), np.nextafter(folded, np.inf)):
+                row = X[rng.integers(len(X))].copy()
+                row[f] = value
+                rows.append(row)
+    return np.array(rows)
+
+
+@pytest.mark.parametrize("target", range(len(TARGET_COLS)), ids=TARGET_COLS)
+def test_parity_on_random_rows(forests, target):
+    flat, sklearn, _, _, X = forests
+    rng = np.random.default_rng(2)
+    lo, hi = X.min(axis=0), X.max(axis=0)
+    rows = lo + rng.random((3000, X.shape[1])) * (hi - lo)
+    rows[:, 0] = rng.integers(0, 5, len(rows))
+    np.testing.assert_allclose(flat.predict(rows)[:, target], sklearn.predict(rows)[:, target], rtol=0, atol=TOLERANCE)
+
+
+@pytest.mark.parametrize("target", range(len(TARGET_COLS)), ids=TARGET_COLS)
+def test_parity_on_split_thresholds(forests, target):
+    flat, sklearn, model, scaler, X = forests
+    rows = boundary_rows(model, scaler, X)
+    np.testing.assert_allclose(flat.predict(rows)[:, target], sklearn.predict(rows)[:, target], rtol=0, atol=TOLERANCE)
+
+
+def test_boundary_rows_catch_naive_unscaling(forests):
+    """Without fold_scaler's bisection the boundary rows would not match."""
+    _, sklearn, model, scaler, X = forests
+    arrays = export_forest(model)
+    split = np.isfinite(arrays["threshold"])
+    feature = arrays["feature"][split]
+    arrays["threshold"][split] = arrays["threshold"][split] * scaler.scale_[feature] + scaler.mean_[feature]
+    rows = boundary_rows(model, scaler, X)
+    assert np.abs(FlatForest(arrays).predict(rows) - sklearn.predict(rows)).max() > TOLERANCE
+
+
+def test_routed_forest_matches_both_engines(forests):
+    flat, sklearn, _, _, X = forests
+    routed = RoutedForest(flat, sklearn, max_flat_rows=100)
+    np.testing.assert_allclose(routed.predict(X[:50]), flat.predict(X[:50]), rtol=0, atol=TOLERANCE)
+    np.testing.assert_allclose(routed.predict(X), sklearn.predict(X), rtol=0, atol=TOLERANCE)
@@ -0,0 +1,76 @@
+"""Batch validation agrees with single-row validation (run: python -m pytest -q)."""
+import numpy as np
+import pytest
+
+from artifact import FEATURE_ORDER, SHAPE_MAP
+from inference import format_predictions, frame_from_csv, frame_from_json, frame_to_matrix, validate_record
+
+LO = np.arange(len(FEATURE_ORDER), dtype=float) * 10
+HI = LO + 5
+
+
+def valid_record(**overrides):
+    record = {"shape": "Circular", **{key: float(lo) + 2.5 for key, lo in zip(FEATURE_ORDER, LO)}}
+    record.update(overrides)
+    return record
+
+
+first, second, last = FEATURE_ORDER[0], FEATURE_ORDER[1], FEATURE_ORDER[-1]
+
+RECORDS = [
+    valid_record(),
+    valid_record(shape="Flat", **{first: LO[0], last: HI[-1]}),  # bounds are inclusive
+    valid_record(**{second: str(LO[1] + 1)}),  # numeric strings are accepted
+    valid_record(shape="Square"),
+    valid_record(shape=["Circular"]),
+    valid_record(shape={"name": "Circular"}),
+    valid_record(shape=1),
+    {k: v for k, v in valid_record().items() if k != "shape"},
+    {k: v for k, v in valid_record().items() if k != second},
+    valid_record(**{second: None}),
+    valid_record(**{second: float("nan")}),
+    valid_record(**{second: float("inf")}),
+    valid_record(**{second: True}),
+    valid_record(**{second: "abc"}),
+    valid_record(**{second: [1, 2]}),
+    valid_record(**{first: LO[0] - 0.01}),
+    valid_record(**{last: HI[-1] + 0.01}),
+    # Several problems: the first in feature order is reported
+    valid_record(**{first: HI[0] + 1, second: None}),
+    valid_record(shape="Square", **{first: None}),
+]
+
+
+def test_frame_to_matrix_matches_validate_record_row_by_row():
+    X, errors = frame_to_matrix(frame_from_json(RECORDS), SHAPE_MAP, FEATURE_ORDER, LO, HI)
+    assert len(errors) == len(RECORDS)
+    for i, record in enumerate(RECORDS):
+        row, error = validate_record(record, SHAPE_MAP, FEATURE_ORDER, LO, HI)
+        assert errors[i] == error, f"record {i}: {record}"
+        if error is None:
+            np.testing.assert_array_equal(X[i], row)
+    assert sum(e is None for e in errors) == 3
+
+
+def test_csv_body_validates_like_json():
+    header = ",".join(["shape", *FEATURE_ORDER])
+    lines = [header]
+    for record in RECORDS[:4]:
+        lines.append(",".join(str(record[k]) for k in ["shape", *FEATURE_ORDER]))
+    df = frame_from_csv("\n".join(lines).encode())
+    _, errors = frame_to_matrix(df, SHAPE_MAP, FEATURE_ORDER, LO, HI)
+    assert errors == [validate_record(r, SHAPE_MAP, FEATURE_ORDER, LO, HI)[1] for r in RECORDS[:4]]
+
+
+@pytest.mark.parametrize("body", [{"a": 1}, [1, 2], [{"a": 1}, "x"]])
+def test_json_body_must_be_an_array_of_objects(body):
+    with pytest.raises(ValueError):
+        frame_from_json(body)
+
+
+def test_format_predictions_rounds_and_clamps_efficiency():
+    out = format_predictions(np.array([[100.004, 20.006, 95.0], [1.0, 2.0, -3.0]]))
+    assert out == [
+        {"Qout": 100.0, "Qloss": 20.01, "Efficiency(%)": 80.0},
+        {"Qout": 1.0, "Qloss": 2.0, "Efficiency(%)": 0.0},
+    ]
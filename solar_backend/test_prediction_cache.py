@@ -0,0 +1,133 @@
+"""Prediction cache: LRU, TTL, versioning and the shared backend (run: python -m pytest -q)."""
+import sqlite3
+
+import pytest
+
+import prediction_cache
+from prediction_cache import PredictionCache, SqliteBackend
+
+VALUE = {"Qout": 1.0, "Qloss": 2.0, "Efficiency(%)": 3.0}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(prediction_cache.time, "monotonic", clock)
+    return clock
+
+
+class FailingBackend:
+    """A shared backend whose every call fails like a locked SQLite file."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def get(self, *args):
+        self.calls += 1
+        raise sqlite3.OperationalError("database is locked")
+
+    set = purge = get
+
+
+def test_quantize_rounds_to_precision():
+    cache = PredictionCache(precision=2)
+    assert cache.quantize(1, [500.004, 0.1234]) == [1, 500.0, 0.12]
+
+
+def test_hit_and_miss_counts():
+    cache = PredictionCache(maxsize=4, version="v1")
+    assert cache.get([0, 1.0]) is None
+    cache.put([0, 1.0], VALUE)
+    assert cache.get([0, 1.0]) == VALUE
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (1, 1, 1)
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = PredictionCache(maxsize=4, ttl=10, version="v1")
+    cache.put([0, 1.0], VALUE)
+    clock.now += 9.9
+    assert cache.get([0, 1.0]) == VALUE
+    clock.now += 0.2
+    assert cache.get([0, 1.0]) is None
+    assert cache.stats()["size"] == 0
+
+
+def test_lru_evicts_least_recently_used():
+    cache = PredictionCache(maxsize=2, version="v1")
+    cache.put([0, 1.0], VALUE)
+    cache.put([0, 2.0], VALUE)
+    cache.get([0, 1.0])  # refreshes 1.0, so 2.0 is now the oldest
+    cache.put([0, 3.0], VALUE)
+    assert cache.get([0, 2.0]) is None
+    assert cache.get([0, 1.0]) == VALUE and cache.get([0, 3.0]) == VALUE
+    assert cache.stats()["evictions"] == 1
+
+
+def test_set_version_drops_everything():
+    cache = PredictionCache(maxsize=4, version="v1")
+    cache.put([0, 1.0], VALUE)
+    cache.set_version("v2")
+    assert cache.get([0, 1.0]) is None
+    assert cache.stats()["version"] == "v2"
+
+
+def test_put_from_a_replaced_version_is_dropped():
+    cache = PredictionCache(maxsize=4, version="v1")
+    cache.set_version("v2")
+    cache.put([0, 1.0], VALUE, "v1")
+    assert cache.get([0, 1.0]) is None
+    cache.put([0, 1.0], VALUE, "v2")
+    assert cache.get([0, 1.0]) == VALUE
+
+
+def test_shared_backend_failure_is_a_miss():
+    backend = FailingBackend()
+    cache = PredictionCache(maxsize=4, version="v1", shared=backend)
+    assert cache.get([0, 1.0]) is None
+    cache.put([0, 1.0], VALUE)  # the shared write fails, the local one still happens
+    assert cache.get([0, 1.0]) == VALUE
+    stats = cache.stats()
+    assert stats["misses"] == 1 and stats["shared_errors"] == backend.calls == 3
+
+
+def test_sqlite_backend_shares_hits_between_caches(tmp_path):
+    path = str(tmp_path / "cache.db")
+    writer = PredictionCache(maxsize=4, version="v1", shared=SqliteBackend(path))
+    reader = PredictionCache(maxsize=4, version="v1", shared=SqliteBackend(path))
+    writer.put([0, 1.0], VALUE)
+    assert reader.get([0, 1.0]) == VALUE
+    assert reader.stats()["shared_hits"] == 1
+
+    other_version = PredictionCache(maxsize=4, version="v2", shared=SqliteBackend(path))
+    assert other_version.get([0, 1.0]) is None
+
+
+def test_sqlite_backend_is_capped(tmp_path):
+    path = str(tmp_path / "cache.db")
+    backend = SqliteBackend(path, max_rows=10, prune_every=5)
+    for i in range(100):
+        backend.set(f"key{i}", "v1", VALUE, ttl=60)
+    count = sqlite3.connect(path).execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+    assert count == 10
+    # The survivors are the ones that expire last
+    assert backend.get("key99", "v1") == VALUE and backend.get("key0", "v1") is None
+
+
+def test_sqlite_backend_prunes_expired_rows(tmp_path):
+    path = str(tmp_path / "cache.db")
+    backend = SqliteBackend(path, max_rows=1000, prune_every=1000)
+    for i in range(5):
+        backend.set(f"old{i}", "v1", VALUE, ttl=-1)
+    backend.set("fresh", "v1", VALUE, ttl=60)
+    backend.prune()
+    keys = [k for (k,) in sqlite3.connect(path).execute("SELECT key FROM predictions")]
+    assert keys == ["fresh"]
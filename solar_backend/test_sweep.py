@@ -0,0 +1,118 @@
+"""Sweep spec parsing and streaming top-k (run: python -m pytest -q)."""
+import json
+
+import numpy as np
+import pytest
+
+from sweep import axis_values, build_axes, sweep_lines
+
+SHAPE_MAP = {"Hexagonal": 0, "Circular": 1}
+FEATURE_ORDER = ["a", "b"]
+LO = np.array([0.0, 10.0])
+HI = np.array([100.0, 20.0])
+
+
+class LinearEngine:
+    """Qout = a + b, Qloss = a, Efficiency = a rounded down to tens (lots of ties)."""
+
+    def predict(self, X):
+        return np.column_stack([X[:, 1] + X[:, 2], X[:, 1], np.floor(X[:, 1] / 10) * 10])
+
+
+def axes_for(params, max_points=1000, shape=None):
+    spec = {"params": params}
+    if shape is not None:
+        spec["shape"] = shape
+    return build_axes(spec, SHAPE_MAP, FEATURE_ORDER, LO, HI, max_points)
+
+
+def lines(axes, **kwargs):
+    return [json.loads(line) for chunk in sweep_lines(LinearEngine(), axes, SHAPE_MAP, FEATURE_ORDER, **kwargs)
+            for line in chunk.splitlines()]
+
+
+# ================================
+# Spec Parsing
+# ================================
+def test_range_defaults_to_validation_bounds_and_clips():
+    axes = axes_for({"a": {"num": 5}, "b": [5, 15, 15, 25]})
+    np.testing.assert_array_equal(axes[0], [0, 1])
+    np.testing.assert_array_equal(axes[1], [0, 25, 50, 75, 100])
+    np.testing.assert_array_equal(axes[2], [10, 15, 20])
+
+
+def test_step_range():
+    np.testing.assert_allclose(axis_values("a", {"start": 0, "stop": 1, "step": 0.25}, 0, 1, 100),
+                               [0, 0.25, 0.5, 0.75, 1])
+
+
+def test_point_budget_is_enforced_across_axes():
+    # 2 shapes x 10 x 50 = 1000 points: exactly at the limit
+    assert len(axes_for({"a": {"num": 10}, "b": {"num": 50}})[2]) == 50
+    with pytest.raises(ValueError):
+        axes_for({"a": {"num": 10}, "b": {"num": 51}})
+    with pytest.raises(ValueError):
+        axes_for({"a": {"num": 10_000_000}, "b": 15})
+
+
+@pytest.mark.parametrize("spec", [
+    {"num": float("inf")},
+    {"num": True},
+    {"num": 2.7},
+    {"num": 0},
+    {"start": 0, "stop": 1000, "step": 1e-310},
+    {"start": 0, "stop": 10, "step": -1},
+    {"start": True, "num": 3},
+    {"start": float("nan"), "num": 3},
+    [[1, 2], [3, 4]],
+    [True, 5],
+    [],
+    "50",
+])
+def test_bad_specs_are_value_errors(spec):
+    with pytest.raises(ValueError):
+        axis_values("a", spec, 0.0, 100.0, 1000)
+
+
+def test_missing_param_and_bad_shape():
+    with pytest.raises(ValueError, match="Missing value for b"):
+        axes_for({"a": 1})
+    with pytest.raises(ValueError, match="Invalid shape"):
+        axes_for({"a": 1, "b": 15}, shape=["Square"])
+
+
+# ================================
+# Streaming + Top-k
+# ================================
+def test_rows_stream_in_grid_order_then_summary():
+    axes = axes_for({"a": {"num": 3}, "b": [10, 20]}, shape="Circular")
+    out = lines(axes, chunk_size=4)
+    assert [row["inputs"]["a"] for row in out[:-1]] == [0, 0, 50, 50, 100, 100]
+    assert out[-1]["summary"]["points"] == 6
+
+
+def test_top_k_across_chunks_matches_a_full_sort():
+    axes = axes_for({"a": {"num": 37}, "b": {"num": 11}})
+    X = np.array(np.meshgrid(*axes, indexing="ij")).reshape(len(axes), -1).T
+    scores = LinearEngine().predict(X)[:, 0]
+    # Best first; ties keep grid order
+    expected = sorted(range(len(X)), key=lambda i: (-scores[i], i))[:10]
+
+    summary = lines(axes, chunk_size=50, top_k=10, objective="Qout")[-1]["summary"]
+    got = [(row["inputs"]["a"], row["inputs"]["b"]) for row in summary["top_k"]]
+    assert got == [(X[i, 1], X[i, 2]) for i in expected]
+
+
+def test_top_k_ties_keep_the_earliest_points():
+    axes = axes_for({"a": {"start": 90, "stop": 99, "num": 10}, "b": 10}, shape="Hexagonal")
+    summary = lines(axes, chunk_size=3, top_k=4, objective="Efficiency")[-1]["summary"]
+    assert [row["inputs"]["a"] for row in summary["top_k"]] == [90, 91, 92, 93]
+
+
+def test_summary_only_stream():
+    axes = axes_for({"a": {"num": 20}, "b": {"num": 5}})
+    out = lines(axes, chunk_size=7, top_k=3, objective="Qout", stream_rows=False, summary_extra={"mode": "fast"})
+    assert len(out) == 1
+    summary = out[0]["summary"]
+    assert summary["points"] == 200 and summary["mode"] == "fast"
+    assert [row["predicted_values"]["Qout"] for row in summary["top_k"]] == [120.0, 120.0, 117.5]
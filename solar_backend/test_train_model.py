@@ -0,0 +1,59 @@
+"""Incremental (warm-start) retraining (run: python -m pytest -q)."""
+import numpy as np
+import pandas as pd
+import pytest
+
+import train_model
+from artifact import FEATURE_COLS, SHAPE_MAP, TARGET_COLS
+
+
+class FrameDataset:
+    """The slice of ColumnarDataset that train_model uses, over an in-memory frame."""
+
+    def __init__(self, df):
+        self.df = df
+
+    def frame(self, columns):
+        return self.df[columns]
+
+    def ranges(self, columns):
+        return {col: (float(self.df[col].min()), float(self.df[col].max())) for col in columns}
+
+
+def synthetic_frame(n, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.uniform(1, 10, (n, len(FEATURE_COLS) - 1)), columns=FEATURE_COLS[1:])
+    df.insert(0, "Shape", rng.choice(list(SHAPE_MAP), n))
+    for k, col in enumerate(TARGET_COLS):
+        df[col] = df[FEATURE_COLS[1 + k]] * 3 + rng.normal(0, 0.1, n)
+    return df
+
+
+@pytest.fixture(autouse=True)
+def no_surrogate(monkeypatch):
+    # The distilled surrogate is irrelevant here and dominates the runtime
+    monkeypatch.setattr(train_model, "build_surrogate", lambda *args, **kwargs: {"fit_seconds": 0.0})
+
+
+def test_incremental_seeds_stay_unique_after_trimming():
+    df = synthetic_frame(60)
+    rows = 30
+    bundle = train_model.train_full(FrameDataset(df[:rows]), "v0", search=False, n_jobs=1)
+    bundle["model"].set_params(n_estimators=4)
+    bundle["model"].estimators_ = bundle["model"].estimators_[:4]
+    bundle["trees_grown"] = 4
+
+    for i in range(1, 6):
+        rows += 5
+        bundle = train_model.train_incremental(
+            FrameDataset(df[:rows]), bundle, f"v{i}", add_trees=2, max_trees=6, n_jobs=1)
+        seeds = [est.random_state for est in bundle["model"].estimators_]
+        assert len(seeds) == min(4 + 2 * i, 6)
+        assert len(set(seeds)) == len(seeds), f"duplicate bootstrap seeds after increment {i}"
+    assert bundle["trees_grown"] == 4 + 2 * 5
+
+
+def test_incremental_returns_none_without_new_rows():
+    df = synthetic_frame(30)
+    bundle = train_model.train_full(FrameDataset(df), "v0", search=False, n_jobs=1)
+    assert train_model.train_incremental(FrameDataset(df), bundle, "v1", n_jobs=1) is None
@@ -1,41 +1,270 @@
-import pandas as pd
-from sklearn.model_selection import train_test_split
+"""Train the forest served by app.py and publish it as a versioned artifact.
+
+    python train_model.py                      # full refit with parallel CV hyperparameter search
+    python train_model.py --no-search          # full refit with DEFAULT_PARAMS
+    python train_model.py --incremental        # grow the current forest on newly appended rows
+"""
+import argparse
+import hashlib
+import os
+import time
+
+import numpy as np
+import sklearn
 from sklearn.ensemble import RandomForestRegressor
-import joblib
-
-# Load Excel file
-df = pd.read_excel("dataset.xlsx", sheet_name="Sheet1")
-
-# One-hot encode Shape column
-df = pd.get_dummies(df, columns=["Shape"], drop_first=True)
-
-# Features and targets
-features = [
-    "Length of plate (L) m",
-    "Breadth/Base (B) m",
-    "Density of air (ρ) kg/m3",
-    "Velocity of air (V) m/s",
-    "Absorptivity (α)",
-    "Transmissivity(τ)",
-    "Intensity of Radiation (I) W/m2",
-    "Specific heat (cp) J/kg°C",
-    "Temperature in (Ti) °C",
-    "Temperature out (To) °C",
-    "Ambient Temperature (Tamb) °C",
-    "Distance Between Plate and Glass (x) m"
-]
-
-X = df[features + list(df.columns[df.columns.str.startswith('Shape_')])]
-y = df[["Qout", "Qloss", "Efficiency (%)"]]
-
-# Train-test split
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-# Train model
-model = RandomForestRegressor(n_estimators=200, random_state=42)
-model.fit(X_train, y_train)
-
-# Save trained model
-joblib.dump(model, "solar_model.pkl")
-
-print("Model trained and saved successfully!")
+from sklearn.metrics import mean_absolute_error, r2_score
+from sklearn.model_selection import GridSearchCV, KFold
+from sklearn.preprocessing import StandardScaler
+
+from artifact import (
+    ARTIFACT_FORMAT,
+    DATASET_PATH,
+    FEATURE_COLS,
+    FEATURE_ORDER,
+    KEY_MAP,
+    MODEL_PATH,
+    SHAPE_MAP,
+    TARGET_COLS,
+    load_artifact,
+    publish_artifact,
+)
+from dataset import open_dataset
+from forest_engine import MAX_EXPORT_DEPTH, FlatForest, export_forest
+from inference import range_arrays
+from surrogate import build_surrogate
+
+# Max allowed |flat engine - sklearn| on the training rows
+PARITY_TOLERANCE = 1e-6
+
+
+# Only these columns are read from the columnar dataset cache
+TRAINING_COLS = ['Shape'] + FEATURE_COLS[1:] + TARGET_COLS
+
+# 🔹 Random Forest Regressor (robust & nonlinear)
+DEFAULT_PARAMS = {"n_estimators": 200, "max_depth": 10, "min_samples_split": 3}
+
+# Searched unless --no-search; depths stay within what forest_engine can afford to flatten
+PARAM_GRID = {
+    "n_estimators": [100, 200],
+    "max_depth": [6, 10, MAX_EXPORT_DEPTH],
+    "min_samples_split": [2, 3, 5],
+}
+
+
+# ================================
+# Data
+# ================================
+def prepare(df):
+    """Map shapes to codes and split into plain X / y arrays."""
+    df = df.copy()
+    df['Shape_num'] = df['Shape'].map(SHAPE_MAP)
+
+    # Plain arrays: the server feeds NumPy matrices, not named frames
+    X = df[FEATURE_COLS].to_numpy(dtype=float)
+    y = df[TARGET_COLS].to_numpy(dtype=float)
+    return X, y
+
+
+def rows_digest(X, y):
+    """Fingerprint of the training rows, used to tell appended data from edited data."""
+    digest = hashlib.sha256()
+    digest.update(np.ascontiguousarray(X).tobytes())
+    digest.update(np.ascontiguousarray(y).tobytes())
+    return digest.hexdigest()
+
+
+def score(model, X_scaled, y):
+    pred = model.predict(X_scaled)
+    return {"r2": float(r2_score(y, pred)), "mae": float(mean_absolute_error(y, pred))}
+
+
+# ================================
+# Artifact
+# ================================
+def package_artifact(model, scaler, X, y, validation_ranges, version=None, metrics=None, trees_grown=None):
+    """Bundle a fitted scaler + forest with everything app.py needs to serve it.
+
+    trees_grown counts every tree this forest line has ever fitted, including
+    ones trimmed since; incremental updates derive their seeds from it.
+    """
+    started = time.perf_counter()
+
+    # Flattened copy of the forest with the scaler folded in, checked against sklearn
+    flat_forest = export_forest(model, scaler)
+    full_engine = FlatForest(flat_forest)
+    drift = np.abs(full_engine.predict(X) - model.predict(scaler.transform(X))).max()
+    if drift > PARITY_TOLERANCE:
+        raise ValueError(f"Flat forest export differs from sklearn by {drift:g}")
+
+    metrics = dict(metrics or {})
+    metrics["export_seconds"] = time.perf_counter() - started
+
+    # Small distilled forest for ?mode=fast, with its error vs the full model
+    lo, hi = range_arrays(validation_ranges, KEY_MAP, FEATURE_ORDER)
+    surrogate = build_surrogate(full_engine, list(SHAPE_MAP.values()), lo, hi)
+    metrics["surrogate_seconds"] = surrogate["fit_seconds"]
+    metrics["n_trees"] = len(model.estimators_)
+
+    return {
+        "format": ARTIFACT_FORMAT,
+        # load_artifact treats a bundle from another sklearn version as stale
+        "sklearn_version": sklearn.__version__,
+        "version": version or time.strftime("%Y%m%d%H%M%S"),
+        "model": model,
+        "scaler": scaler,
+        "flat_forest": flat_forest,
+        "surrogate": surrogate,
+        "shape_map": dict(SHAPE_MAP),
+        "feature_cols": list(FEATURE_COLS),
+        "target_cols": list(TARGET_COLS),
+        "feature_order": list(FEATURE_ORDER),
+        "key_map": dict(KEY_MAP),
+        "validation_ranges": validation_ranges,
+        "n_samples": int(len(X)),
+        "trees_grown": int(trees_grown or len(model.estimators_)),
+        "rows_sha256": rows_digest(X, y),
+        "metrics": metrics,
+    }
+
+
+def dataset_version(dataset):
+    """Artifact version for a model trained now on dataset: timestamp + content hash."""
+    return time.strftime("%Y%m%d%H%M%S") + "-" + dataset.sha256[:8]
+
+
+# ================================
+# Full Retrain with CV Search
+# ================================
+def search_params(X_scaled, y, folds=5, n_jobs=-1):
+    """Grid-search PARAM_GRID with k-fold CV, fanning the fits out over all cores."""
+    search = GridSearchCV(
+        RandomForestRegressor(random_state=42),
+        PARAM_GRID,
+        scoring={"r2": "r2", "mae": "neg_mean_absolute_error"},
+        refit=False,
+        cv=KFold(n_splits=min(folds, len(X_scaled)), shuffle=True, random_state=42),
+        n_jobs=n_jobs,
+    )
+    search.fit(X_scaled, y)
+
+    results = search.cv_results_
+    best = int(np.argmax(results["mean_test_r2"]))
+    return results["params"][best], {
+        "cv_folds": search.n_splits_,
+        "cv_candidates": len(results["params"]),
+        "cv_r2": float(results["mean_test_r2"][best]),
+        "cv_r2_std": float(results["std_test_r2"][best]),
+        "cv_mae": float(-results["mean_test_mae"][best]),
+    }
+
+
+def train_full(dataset, version, search=True, folds=5, n_jobs=-1):
+    X, y = prepare(dataset.frame(TRAINING_COLS))
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(X)
+
+    metrics = {"mode": "full"}
+    params = DEFAULT_PARAMS
+    if search:
+        started = time.perf_counter()
+        params, cv_metrics = search_params(X_scaled, y, folds, n_jobs)
+        metrics.update(cv_metrics, search_seconds=time.perf_counter() - started)
+
+    started = time.perf_counter()
+    model = RandomForestRegressor(random_state=42, n_jobs=n_jobs, **params)
+    model.fit(X_scaled, y)
+    model.set_params(n_jobs=None)  # single-row serving is faster without joblib dispatch
+    metrics.update(params=params, train_seconds=time.perf_counter() - started, train=score(model, X_scaled, y))
+
+    return package_artifact(model, scaler, X, y, dataset.ranges(FEATURE_COLS[1:]), version, metrics)
+
+
+# ================================
+# Incremental (warm-start) Update
+# ================================
+def train_incremental(dataset, previous, version, add_trees=50, max_trees=400, n_jobs=-1):
+    """Grow the previous forest with add_trees new trees instead of refitting it.
+
+    The new trees see all rows, old and appended; the existing trees and the
+    scaler stay as they are (the folded thresholds depend on the scaler).
+    Once the forest exceeds max_trees the oldest trees are dropped. Returns
+    None when no rows were appended, and raises ValueError when earlier rows
+    were edited or removed, which needs a full retrain instead.
+    """
+    X, y = prepare(dataset.frame(TRAINING_COLS))
+    n_old = previous["n_samples"]
+    if len(X) < n_old or rows_digest(X[:n_old], y[:n_old]) != previous.get("rows_sha256"):
+        raise ValueError("Earlier training rows changed; running a full retrain instead.")
+    if len(X) == n_old:
+        return None
+
+    model, scaler = previous["model"], previous["scaler"]
+    trees_grown = previous.get("trees_grown", len(model.estimators_))
+    X_scaled = scaler.transform(X)
+    X_new, y_new = X_scaled[n_old:], y[n_old:]
+    metrics = {"mode": "incremental", "parent_version": previous["version"], "new_rows": int(len(X_new))}
+    if len(X_new) >= 2:
+        metrics["new_rows_before"] = score(model, X_new, y_new)
+
+    started = time.perf_counter()
+    # Warm start skips len(estimators_) draws of random_state before seeding the
+    # new trees. After trimming that length stays at max_trees, so a fixed
+    # random_state would hand every increment the same seeds; a fresh state
+    # per increment keeps the bootstrap samples distinct.
+    model.set_params(
+        warm_start=True,
+        n_jobs=n_jobs,
+        n_estimators=len(model.estimators_) + add_trees,
+        random_state=42 + trees_grown,
+    )
+    model.fit(X_scaled, y)
+    if len(model.estimators_) > max_trees:
+        model.estimators_ = model.estimators_[-max_trees:]
+        model.n_estimators = max_trees
+    model.set_params(warm_start=False, n_jobs=None)
+    metrics.update(train_seconds=time.perf_counter() - started, train=score(model, X_scaled, y))
+    if len(X_new) >= 2:
+        metrics["new_rows_after"] = score(model, X_new, y_new)
+
+    return package_artifact(model, scaler, X, y, dataset.ranges(FEATURE_COLS[1:]), version, metrics,
+                            trees_grown=trees_grown + add_trees)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--incremental", action="store_true", help="grow the current artifact on appended rows")
+    parser.add_argument("--no-search", dest="search", action="store_false", help="skip the CV search")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--jobs", type=int, default=-1, help="parallel jobs for search and fitting")
+    parser.add_argument("--add-trees", type=int, default=50)
+    parser.add_argument("--max-trees", type=int, default=400)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+
+    # Columnar cache of dataset.xlsx; the workbook is only parsed when it changed
+    dataset = open_dataset(DATASET_PATH)
+    version = dataset_version(dataset)
+
+    bundle = None
+    if args.incremental and os.path.exists(MODEL_PATH):
+        try:
+            previous = load_artifact(MODEL_PATH, mmap_mode=None)
+            bundle = train_incremental(dataset, previous, version, args.add_trees, args.max_trees, args.jobs)
+        except ValueError as e:
+            print(f"⚠️ {e}")
+        else:
+            if bundle is None:
+                print(f"✅ No new rows since {previous['version']}; artifact unchanged.")
+                return
+    if bundle is None:
+        bundle = train_full(dataset, version, args.search, args.folds, args.jobs)
+
+    archive_path = publish_artifact(bundle, MODEL_PATH)
+    print(f"✅ Model artifact {version} trained on {bundle['n_samples']} rows "
+          f"in {time.perf_counter() - started:.2f}s and saved to {MODEL_PATH} (archived as {archive_path})")
+    print("📊 Metrics:", bundle["metrics"])
+
+
+if __name__ == "__main__":
+    main()